@@ -1,10 +1,13 @@
 package ma.enset.gdg.battle.client;
 
 import org.springframework.cloud.openfeign.FeignClient;
+import org.springframework.http.MediaType;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.GetMapping;
 import org.springframework.web.bind.annotation.PostMapping;
 import org.springframework.web.bind.annotation.RequestBody;
+import org.springframework.web.bind.annotation.RequestPart;
+import org.springframework.web.multipart.MultipartFile;
 
 import java.util.Map;
 
@@ -42,6 +45,17 @@ public interface AIServiceClient {
     @PostMapping("/aiassistant")
     ResponseEntity<Map<String, Object>> aiAssistant(@RequestBody Map<String, Object> request);
 
+    /**
+     * Process uploaded documents into the vector store
+     * @param files Documents and images to process
+     * @param scope Optional scope (e.g. a course ID); files uploaded again under the
+     *              same scope and name replace their earlier version
+     * @return Document processing results
+     */
+    @PostMapping(value = "/process-documents", consumes = MediaType.MULTIPART_FORM_DATA_VALUE)
+    ResponseEntity<Map<String, Object>> processDocuments(@RequestPart("files") MultipartFile[] files,
+                                                         @RequestPart(value = "scope", required = false) String scope);
+
     /**
      * Health check
      * @return Service health status
@@ -258,12 +258,14 @@ class AIServiceClient:
         logger.info(f"AI assistant query: {query[:50]}...")
         return self._make_request("POST", "/aiassistant", json=payload)
     
-    def process_documents(self, file_paths: List[str]) -> Dict[str, Any]:
+    def process_documents(self, file_paths: List[str], scope: Optional[str] = None) -> Dict[str, Any]:
         """
         Process uploaded documents
         
         Args:
             file_paths: List of file paths to process
+            scope: Optional scope (e.g. a course ID); files uploaded again under the
+                same scope and name replace their earlier version
             
         Returns:
             Document processing results
@@ -282,7 +284,8 @@ class AIServiceClient:
         headers = {k: v for k, v in self.session.headers.items() if k.lower() != 'content-type'}
         
         url = f"{self.config.base_url}/process-documents"
-        response = requests.post(url, files=files, headers=headers, timeout=self.config.timeout)
+        data = {'scope': scope} if scope else None
+        response = requests.post(url, files=files, data=data, headers=headers, timeout=self.config.timeout)
         
         if response.status_code == 200:
             return response.json()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Vector Store Compaction
+One-off cleanup of the duplicate chunks left by ingestion runs that wrote
+every chunk under a random point ID, so each re-upload added a full copy.
+
+Chunks are duplicates when they belong to the same document, content type,
+page and chunk index and hold the same text. The newest copy is kept.
+
+Those runs also derived document IDs from the upload path, so a file ingested
+again today is stored under a new document ID, next to its old chunks. With
+--drop-reingested, chunks of documents unknown to the document registry are
+deleted once the file they came from has been ingested again: from the same
+path, or with the content the file at that path has now.
+
+Usage: python compact_vector_store.py [--collection $VECTOR_COLLECTION] [--drop-reingested] [--dry-run]
+"""
+
+import sys
+import os
+import argparse
+import hashlib
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from langchain_qdrant import QdrantVectorStore
+from src.utils.vector_store import QDRANT_URL, VECTOR_COLLECTION
+from src.utils.document_registry import get_document_registry
+
+CONTENT_KEY = QdrantVectorStore.CONTENT_KEY
+METADATA_KEY = QdrantVectorStore.METADATA_KEY
+SCROLL_BATCH_SIZE = 256
+
+
+def scroll_points(client, collection_name):
+    """Yield every point of the collection, with its payload"""
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=SCROLL_BATCH_SIZE,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        yield from points
+        if offset is None:
+            return
+
+
+def duplicate_key(payload):
+    """Chunks with the same key hold the same content"""
+    metadata = payload.get(METADATA_KEY) or {}
+    text_hash = hashlib.sha256((payload.get(CONTENT_KEY) or "").encode("utf-8")).hexdigest()
+    if metadata.get("doc_id"):
+        return (metadata["doc_id"], metadata.get("content_type"), metadata.get("page"),
+                metadata.get("chunk_index"), text_hash)
+    # Points stored outside the pipeline: only exact copies are duplicates
+    return (None, metadata.get("source"), text_hash)
+
+
+def file_hash(path):
+    """sha256 of a file's content, as the document registry records it"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ReingestedCheck:
+    """
+    Tells whether a point is a legacy chunk of a file that was ingested again since.
+    Legacy chunks carry the path they were ingested from: the file was ingested again
+    when the registry has a document under that path (directory ingestion keys files
+    by their absolute path), or one with the content the file at that path has now.
+    """
+
+    def __init__(self, registry, collection_name):
+        self.registry = registry
+        self.collection_name = collection_name
+        # {doc_id: registry entry of the legacy document's new version, or None}
+        self._new_versions = {}
+        # {legacy doc_id: (file path, registry entry of its new version)}
+        self.matched = {}
+
+    def _new_version(self, file_path):
+        if not file_path:
+            return None
+        path = os.path.abspath(file_path)
+        entry = self.registry.find_by_key(path, self.collection_name)
+        if entry is None and os.path.isfile(path):
+            entry = self.registry.find_by_hash(file_hash(path), self.collection_name)
+        return entry
+
+    def __call__(self, metadata):
+        doc_id = metadata.get("doc_id")
+        if not doc_id:
+            return False
+        if doc_id not in self._new_versions:
+            entry = None
+            if self.registry.find_by_id(doc_id, self.collection_name) is None:
+                entry = self._new_version(metadata.get("file_path"))
+            if entry is not None:
+                self.matched[doc_id] = (metadata.get("file_path"), entry)
+            self._new_versions[doc_id] = entry
+        return self._new_versions[doc_id] is not None
+
+
+def plan_compaction(client, collection_name, reingested=None):
+    """
+    Return (point IDs to delete as duplicates, point IDs to delete as legacy chunks
+    of re-ingested files) along with the number of points scanned. Legacy chunks
+    are only looked for when reingested (a ReingestedCheck) is given.
+    """
+    # Best point of each group of duplicates: (rank, point ID)
+    best = {}
+    point_ids = []
+    legacy = []
+    for point in scroll_points(client, collection_name):
+        metadata = point.payload.get(METADATA_KEY) or {}
+        if reingested is not None and reingested(metadata):
+            legacy.append(point.id)
+            continue
+        point_ids.append(point.id)
+        point_id = str(point.id)
+        # Prefer the copy already under its chunk ID, then the most recent one
+        rank = (point_id == metadata.get("chunk_id"), metadata.get("added_date") or "", point_id)
+        key = duplicate_key(point.payload)
+        if key not in best or rank > best[key][0]:
+            best[key] = (rank, point_id)
+
+    kept = {point_id for _, point_id in best.values()}
+    to_delete = [point_id for point_id in point_ids if str(point_id) not in kept]
+    return to_delete, legacy, len(point_ids) + len(legacy)
+
+
+def delete_points(client, collection_name, point_ids):
+    for start in range(0, len(point_ids), SCROLL_BATCH_SIZE):
+        client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=point_ids[start:start + SCROLL_BATCH_SIZE])
+        )
+
+
+def compact(client, collection_name, dry_run=False, drop_reingested=False, registry=None):
+    print(f"🔍 Scanning collection '{collection_name}'...")
+    registry = registry or get_document_registry()
+    reingested = ReingestedCheck(registry, collection_name) if drop_reingested else None
+    to_delete, legacy, scanned = plan_compaction(client, collection_name, reingested)
+    print(f"  Points scanned: {scanned}")
+    print(f"  Duplicates to delete: {len(to_delete)}")
+    if drop_reingested:
+        print(f"  Legacy chunks of re-ingested files to delete: {len(legacy)}")
+        for file_path, entry in reingested.matched.values():
+            print(f"    {file_path} -> ingested again as {entry['source']} ({entry['doc_id']})")
+
+    if dry_run:
+        print("ℹ️  Dry run, nothing was changed")
+        return {"scanned": scanned, "deleted": 0, "legacy_deleted": 0}
+
+    delete_points(client, collection_name, to_delete + legacy)
+    if to_delete or legacy:
+        # Cached search results may still point at the deleted chunks
+        registry.bump_collection_version(collection_name)
+    remaining = client.count(collection_name=collection_name).count
+    print(f"✅ Compaction done: {scanned} -> {remaining} points")
+    return {"scanned": scanned, "deleted": len(to_delete), "legacy_deleted": len(legacy)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove duplicate chunks from the vector store")
+    parser.add_argument("--collection", default=VECTOR_COLLECTION, help="Qdrant collection to compact")
+    parser.add_argument("--url", default=QDRANT_URL, help="Qdrant URL")
+    parser.add_argument("--drop-reingested", action="store_true",
+                        help="Also delete the chunks of legacy documents whose file was ingested again")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+    args = parser.parse_args()
+
+    try:
+        client = QdrantClient(url=args.url)
+        compact(client, args.collection, dry_run=args.dry_run, drop_reingested=args.drop_reingested)
+        return 0
+    except Exception as e:
+        print(f"❌ Compaction failed: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
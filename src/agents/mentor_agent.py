@@ -2,14 +2,14 @@ from langchain_nvidia import ChatNVIDIA
 from langchain_core.messages import SystemMessage, HumanMessage
 import os
 import dotenv
-from ..utils.vector_store import VectorStore
+from ..utils.vector_store import get_vector_store
 
 dotenv.load_dotenv()
 
 MODEL_NAME = "meta/llama-3.1-70b-instruct"
 
 def mentor_pipeline(user_query: str) -> str:
-    vector_store = VectorStore()
+    vector_store = get_vector_store()
     llm = ChatNVIDIA(model=MODEL_NAME, nvidia_api_key=os.getenv("NVIDIA_API_KEY"))
 
     # Get relevant context from vector store
@@ -2,14 +2,22 @@
 # 1. for generating qcm or code
 # 2. for evaluating user code and providing feedback
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, request, jsonify, send_file
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 from .agents.eval_exo_agent import evaluate_and_feedback
 from .services.generate_code_or_exo import generate_lab
 from .agents.router_agent import route_query
 from .services.documents_pipeline import add_new_documents
-from .utils.file_helpers import allowed_file, save_uploaded_files
+from .services.ingestion_jobs import new_job_folder, submit_job, get_job, start_ingestion_workers
+from .utils.file_helpers import save_uploaded_files, spool_uploaded_files
+from .utils.spooled_upload import spool_stream
+from .utils.model_registry import model_registry, warm_up_models
+from .utils.image_cache import image_cache_stats
+from .utils.embedding_cache import embedding_cache_stats
+from .utils.retrieval_cache import retrieval_cache_stats
+from .utils.vector_store import get_vector_store, vector_store_health
+from .utils.search_documents import search_documents
 from .eureka_config import register_with_eureka, unregister_from_eureka
 import os
 import time
@@ -18,7 +26,16 @@ import signal
 import sys
 load_dotenv()
 
+
+class SpoolingRequest(Request):
+    """Keeps uploads in memory up to UPLOAD_SPOOL_MAX_BYTES per request, in temp files beyond"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spool_stream(total_content_length, filename)
+
+
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 
 # File upload configuration
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uploads')
@@ -30,6 +47,10 @@ os.makedirs(PROCESSED_FOLDER, exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 30 * 1024 * 1024  # 30MB max-limit
+# Queue /process-documents uploads as background jobs unless the request says otherwise (?async=false)
+INGESTION_ASYNC = os.getenv('INGESTION_ASYNC', 'false').lower() == 'true'
+# Largest page of /search results
+SEARCH_MAX_PAGE_SIZE = int(os.getenv('SEARCH_MAX_PAGE_SIZE', '100'))
 
 # set up langsmith tracing for all the invocations
 
@@ -54,7 +75,14 @@ def health_check():
         },
         "dependencies": {
             "flask": "OK",
-            "ai_services": "OK"
+            "ai_services": "OK",
+            "vector_store": vector_store_health()
+        },
+        "models": model_registry.status(),
+        "caches": {
+            "image_analysis": image_cache_stats(),
+            "embeddings": embedding_cache_stats(),
+            "retrieval": retrieval_cache_stats()
         }
     }), 200
 
@@ -73,7 +101,9 @@ def actuator_info():
             {"path": "/generate", "method": "POST", "description": "Generate code exercises or QCM"},
             {"path": "/evaluate", "method": "POST", "description": "Evaluate user code submissions"},
             {"path": "/aiassistant", "method": "POST", "description": "AI assistant for queries"},
-            {"path": "/process-documents", "method": "POST", "description": "Process uploaded documents"}
+            {"path": "/process-documents", "method": "POST", "description": "Process uploaded documents"},
+            {"path": "/process-documents/jobs/<job_id>", "method": "GET", "description": "Status of a document processing job"},
+            {"path": "/search", "method": "POST", "description": "Search processed documents with filters"}
         ]
     }), 200
 
@@ -170,27 +200,28 @@ def process_documents():
     if not files or all(file.filename == '' for file in files):
         return jsonify({"error": "No selected files"}), 400
 
+    # Files uploaded again under the same scope (e.g. a course ID) and name replace their earlier version
+    scope = request.form.get('scope', '').strip() or None
+
+    run_async = request.args.get('async', str(INGESTION_ASYNC)).lower() == 'true'
+    if run_async:
+        return submit_documents_job(files, scope)
+
     try:
         start_time = time.time()
         
-        # Save uploaded files using imported helper
-        saved_files = save_uploaded_files(files, app.config['UPLOAD_FOLDER'])
-        if not saved_files:
+        # Process the uploads where the request parser spooled them, without saving copies
+        uploads = spool_uploaded_files(files)
+        if not uploads:
             return jsonify({"error": "No valid files uploaded"}), 400
 
         # Process the documents
         results = add_new_documents(
-            input_files=saved_files,
-            output_dir=PROCESSED_FOLDER
+            input_files=uploads,
+            output_dir=PROCESSED_FOLDER,
+            scope=scope
         )
 
-        # Clean up uploaded files
-        for filepath in saved_files:
-            try:
-                os.remove(filepath)
-            except Exception as e:
-                print(f"Error removing temporary file {filepath}: {e}")
-
         # Add total processing time
         total_time = time.time() - start_time
         
@@ -203,6 +234,73 @@ def process_documents():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def submit_documents_job(files, scope=None):
+    """Save the uploads of an asynchronous request and queue them as an ingestion job"""
+    try:
+        job_id, job_folder = new_job_folder()
+        saved_files = save_uploaded_files(files, job_folder)
+        if not saved_files:
+            os.rmdir(job_folder)
+            return jsonify({"error": "No valid files uploaded"}), 400
+
+        submit_job(job_id, saved_files, scope)
+        return jsonify({
+            "message": "Documents queued for processing",
+            "job_id": job_id,
+            "status_url": f"/process-documents/jobs/{job_id}"
+        }), 202
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/process-documents/jobs/<job_id>', methods=['GET'])
+def document_job_status(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@app.route('/search', methods=['POST'])
+def search():
+    data = request.json or {}
+    query = data.get("query", "")
+
+    if not query:
+        return jsonify({"error": "Query is required"}), 400
+
+    try:
+        page = int(data.get("page", 1))
+        page_size = int(data.get("page_size", 10))
+        dense_weight = float(data["dense_weight"]) if data.get("dense_weight") is not None else None
+        sparse_weight = float(data["sparse_weight"]) if data.get("sparse_weight") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "page and page_size must be integers, dense_weight and sparse_weight numbers"}), 400
+    if page < 1 or not 1 <= page_size <= SEARCH_MAX_PAGE_SIZE:
+        return jsonify({"error": f"page must be at least 1 and page_size between 1 and {SEARCH_MAX_PAGE_SIZE}"}), 400
+
+    try:
+        # Fetch one extra result to tell whether another page follows
+        results = search_documents(
+            query=query,
+            content_types=data.get("content_types"),
+            doc_ids=data.get("doc_ids"),
+            file_types=data.get("file_types"),
+            date_from=data.get("date_from"),
+            date_to=data.get("date_to"),
+            dense_weight=dense_weight,
+            sparse_weight=sparse_weight,
+            limit=page_size + 1,
+            offset=(page - 1) * page_size
+        )
+        return jsonify({
+            "results": results[:page_size],
+            "page": page,
+            "page_size": page_size,
+            "has_more": len(results) > page_size
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # run app for production
 if __name__ == '__main__':
     HOST = os.getenv('HOST', '0.0.0.0')
@@ -222,6 +320,16 @@ if __name__ == '__main__':
     signal.signal(signal.SIGTERM, signal_handler)
     atexit.register(cleanup)
     
+    # Load the models listed in WARMUP_MODELS before taking traffic
+    warm_up_models()
+    # Connect to Qdrant and migrate the collection to the configured profile
+    try:
+        get_vector_store()
+    except Exception as e:
+        print(f"Warning: Vector store unavailable at startup, will retry on first use: {e}")
+    # Run queued document processing jobs in the background
+    start_ingestion_workers(PROCESSED_FOLDER)
+
     # Register with Eureka
     eureka_registered = register_with_eureka()
     if not eureka_registered:
@@ -1,21 +1,41 @@
-from src.utils.vector_store import VectorStore
+from src.utils.vector_store import VectorStore, get_vector_store
 import os
 import hashlib
-from PIL import Image
-from src.utils.image_extractor import extract_images_by_format
-from src.utils.table_extractor import extract_tables_by_format
-from src.utils.text_extractor import extract_text_by_format
-from src.utils.image_processor import process_images, process_image_and_save
+from src.utils.document_parser import parse_document_by_format, page_fingerprints
+from src.utils.image_processor import process_images, describe_images
+from src.utils.image_captioning import CAPTION_BATCH_SIZE
+from src.utils.image_triage import ImageTriage
+from src.utils.image_extractor import decode_image
+from src.utils.document_registry import get_document_registry
+from src.utils.stage_timer import StageTimer, NullTimer
+from src.utils.spooled_upload import iter_source_blocks, read_source, source_name
 import uuid
 from datetime import datetime
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import warnings
 
 DOCUMENT_EXTENSIONS = ('.pdf', '.docx', '.pptx')
 IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
 
+# Bump whenever extraction, chunking or embedding changes, so stored documents get re-ingested
+PIPELINE_VERSION = "7"
+
+# Number of files ingested at the same time by add_new_documents/process_documents
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "1"))
+
+# Keep a copy of the extracted text/tables/image analysis under the output directory
+SAVE_EXTRACTED_ARTIFACTS = os.getenv("SAVE_EXTRACTED_ARTIFACTS", "false").lower() == "true"
+
+# Artifact file and block separator for each record kind
+ARTIFACT_FILES = {
+    "text": ("extracted_text.txt", "\n"),
+    "table": ("tables.txt", "\n\n"),
+    "image": ("image_analysis.txt", "\n" + "-"*50 + "\n"),
+}
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -27,74 +47,252 @@ def is_valid_image(filename: str) -> bool:
     """Check if file is a supported image type"""
     return filename.lower().endswith(IMAGE_EXTENSIONS)
 
-def create_metadata(file_path: str, file_type: str = None) -> dict:
-    """Create standard metadata for a file"""
-    filename = os.path.basename(file_path)
+def create_metadata(file_path, file_type: str = None) -> dict:
+    """Create standard metadata for a file (a path or a SpooledUpload)"""
+    filename = source_name(file_path)
     return {
         "filename": filename,
         "file_type": os.path.splitext(filename)[1],
-        "file_path": file_path,
+        "file_path": file_path if isinstance(file_path, str) else filename,
         "type": file_type,
         "added_date": datetime.now().isoformat()
     }
 
-def get_document_id(file_path: str) -> str:
-    """Generate unique document ID based on file path"""
-    # Generate a UUID v5 using the file path as namespace
+def get_document_id(key: str) -> str:
+    """Generate unique document ID based on a key (the document's content hash)"""
+    # Generate a UUID v5 using the key as name
     namespace = uuid.UUID('6ba7b810-9dad-11d1-80b4-00c04fd430c8')  # UUID namespace for URLs
-    return str(uuid.uuid5(namespace, file_path))
+    return str(uuid.uuid5(namespace, key))
+
+def get_content_hash(file_path) -> str:
+    """Compute the sha256 of a file's content"""
+    digest = hashlib.sha256()
+    for block in iter_source_blocks(file_path):
+        digest.update(block)
+    return digest.hexdigest()
+
+def chunks_intact(vector_store: VectorStore, entry: dict) -> bool:
+    """Whether the vector store still holds every chunk recorded for a registry entry"""
+    return vector_store.count_chunks(entry["doc_id"]) >= len(entry["chunk_ids"])
+
+def get_document_key(file_path, scope: str = None):
+    """Key identifying a document across uploads: its file name within scope, or None without a scope"""
+    return f"{scope}/{source_name(file_path)}" if scope else None
+
+def ingest_file(file_path, output_dir: str, vector_store: VectorStore, timer=None,
+                document_key: str = None) -> dict:
+    """
+    Process a single document or image file into the vector store.
+    file_path is a path or a SpooledUpload processed straight from memory.
+
+    Files whose content was already ingested by the current PIPELINE_VERSION are
+    skipped. A document is identified by its content hash, or by document_key when
+    given: a file uploaded under the key of an earlier document, with different
+    content, keeps that document's ID and has its previous chunks overwritten in
+    place; for PDFs and decks only the pages whose fingerprint changed are
+    re-processed, and chunks the new version no longer has are deleted once it is
+    stored. Without a key, new content is always a new document.
+    Time spent per stage is recorded on timer (a StageTimer) when given.
+    Returns a dict of processing details, or None when the file type is not supported.
+    """
+    filename = source_name(file_path)
+    if not (is_valid_document(filename) or is_valid_image(filename)):
+        return None
+    timer = timer or NullTimer()
+
+    with timer.stage("fingerprint"):
+        registry = get_document_registry()
+        # Registry entries only describe what this collection holds, as embedded by this embedder
+        store = {"collection": vector_store.collection_name, "embedder": vector_store.embedder}
+        content_hash = get_content_hash(file_path)
+        # The file name alone says nothing about identity: files from different
+        # courses share names, and must never replace each other's chunks. A keyed
+        # document is updated in place, whatever else holds the uploaded content
+        previous = registry.find_by_key(document_key, **store) if document_key else None
+        if previous is None:
+            previous = registry.find_by_hash(content_hash, **store)
+        if previous and not chunks_intact(vector_store, previous):
+            # The collection lost the chunks (wiped or recreated): ingest the file again
+            previous = {**previous, "pipeline_version": None, "pages": None}
+        if (previous and previous["content_hash"] == content_hash
+                and previous["pipeline_version"] == PIPELINE_VERSION):
+            logger.info(f"Skipping {filename}: unchanged since it was ingested as {previous['source']}")
+            return {"skipped": True, "doc_id": previous["doc_id"]}
+
+        doc_id = previous["doc_id"] if previous else get_document_id(content_hash)
+        if previous is None:
+            existing = registry.find_by_id(doc_id, **store)
+            if existing and existing["content_hash"] == f"incomplete:{content_hash}":
+                # An earlier upload of this content that was stored incomplete
+                previous = existing
+            elif existing:
+                # A document first ingested with this content has changed since
+                doc_id = str(uuid.uuid4())
+        fingerprints = page_fingerprints(file_path) if is_valid_document(filename) else None
+
+    # Pages kept from the earlier version: {page: {"fingerprint": ..., "chunk_ids": [...]}}
+    kept_pages = {}
+    changed_pages = None
+    if (previous and fingerprints is not None and previous["pages"] is not None
+            and previous["pipeline_version"] == PIPELINE_VERSION):
+        old_pages = {int(page): entry for page, entry in previous["pages"].items()}
+        kept_pages = {
+            page: entry for page, entry in old_pages.items()
+            if fingerprints.get(page) == entry["fingerprint"]
+        }
+        changed_pages = set(fingerprints) - set(kept_pages)
+
+    if is_valid_document(filename):
+        doc_metadata = create_metadata(file_path, "document")
+        details = process_single_document(
+            file_path=file_path,
+            doc_output_dir=os.path.join(output_dir, os.path.splitext(filename)[0]),
+            doc_id=doc_id,
+            doc_metadata=doc_metadata,
+            vector_store=vector_store,
+            pages=changed_pages,
+            fingerprints=fingerprints,
+            timer=timer
+        )
+    else:
+        details = process_single_image(file_path, output_dir, vector_store, doc_id=doc_id, timer=timer)
+
+    chunks = details.pop("chunks")
+    failed_chunks = details["failed_chunks"]
+    pages = None
+    if fingerprints is not None:
+        pages = {page: kept_pages.get(page) or {"fingerprint": fingerprint, "chunk_ids": []}
+                 for page, fingerprint in fingerprints.items()}
+        for page, chunk_id in chunks:
+            pages[page]["chunk_ids"].append(chunk_id)
+        # Pages missing chunks don't match any fingerprint, so the next upload redoes them
+        for failure in failed_chunks:
+            if failure["page"] in pages:
+                pages[failure["page"]]["fingerprint"] = None
+        details["pages_total"] = len(fingerprints)
+        details["pages_processed"] = len(fingerprints) - len(kept_pages)
+    chunk_ids = [chunk_id for entry in (pages or {}).values() for chunk_id in entry["chunk_ids"]]
+    chunk_ids += [chunk_id for page, chunk_id in chunks if pages is None or page not in pages]
+
+    # Chunks are upserted over their earlier versions, so only what the new version
+    # no longer has is left to delete: removed pages, surplus chunks and duplicates
+    with timer.stage("cleanup"):
+        vector_store.delete_stale_chunks(doc_id, chunk_ids)
+    # Searches cached before this document changed are stale now
+    registry.bump_collection_version(vector_store.collection_name)
+
+    if failed_chunks:
+        logger.warning(f"{len(failed_chunks)} chunks of {filename} could not be stored")
+        # Keep the stored chunks, but don't let re-uploads of this content be skipped
+        content_hash = f"incomplete:{content_hash}"
+    registry.record(doc_id, filename, content_hash, PIPELINE_VERSION, chunk_ids,
+                    {str(page): entry for page, entry in pages.items()} if pages is not None else None,
+                    document_key or (previous or {}).get("document_key"), **store)
+    return {"skipped": False, "doc_id": doc_id, **details}
 
-def process_documents(input_dir: str, output_dir: str) -> dict:
-    """Process all documents in a directory"""
-    vector_store = VectorStore()
+def _ingest_timed(file_path, output_dir: str, vector_store: VectorStore, progress=None,
+                  scope: str = None) -> tuple:
+    """
+    Run ingest_file, under the document key of the file within scope, and return
+    (details, error, processing_time).
+    progress(filename, update) is called with status and stage updates when given.
+    """
+    filename = source_name(file_path)
+
+    def report(update):
+        if progress is not None:
+            try:
+                progress(filename, update)
+            except Exception as e:
+                logger.error(f"Error reporting progress for {filename}: {e}")
+
+    timer = StageTimer(on_stage=lambda stage: report({"status": "running", "stage": stage}))
+    start_time = time.time()
+    try:
+        details = ingest_file(file_path, output_dir, vector_store, timer=timer,
+                              document_key=get_document_key(file_path, scope))
+        if details is not None:
+            details["stages"] = timer.report()
+        report({"status": "done", "stage": None, "stages": timer.report()})
+        return details, None, time.time() - start_time
+    except Exception as e:
+        report({"status": "failed", "stage": None, "stages": timer.report(), "error": str(e)})
+        return None, e, time.time() - start_time
+
+def ingest_files(file_paths: list, output_dir: str, vector_store: VectorStore,
+                 max_workers: int = None, progress=None, scope: str = None) -> list:
+    """
+    Ingest several files with at most max_workers (defaults to INGEST_CONCURRENCY)
+    in flight, all sharing one VectorStore. Files are keyed by their name within
+    scope (e.g. a course), when given, so re-uploads update the earlier version.
+    Returns (file_path, details, error, processing_time) tuples in input order,
+    where details is None for unsupported files.
+    """
+    max_workers = max_workers or INGEST_CONCURRENCY
+    if max_workers <= 1 or len(file_paths) <= 1:
+        outcomes = [_ingest_timed(path, output_dir, vector_store, progress, scope) for path in file_paths]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            outcomes = list(executor.map(
+                lambda path: _ingest_timed(path, output_dir, vector_store, progress, scope),
+                file_paths
+            ))
+    return [(path, *outcome) for path, outcome in zip(file_paths, outcomes)]
+
+def process_documents(input_dir: str, output_dir: str, max_workers: int = None) -> dict:
+    """Process all documents in a directory, keyed by their path"""
+    vector_store = get_vector_store()
     results = {"success": [], "failed": []}
-    
-    for filename in os.listdir(input_dir):
-        file_path = os.path.join(input_dir, filename)
-        try:
-            if is_valid_document(filename):
-                doc_metadata = create_metadata(file_path, "document")
-                process_single_document(
-                    file_path=file_path,
-                    doc_output_dir=os.path.join(output_dir, os.path.splitext(filename)[0]),
-                    doc_id=get_document_id(file_path),
-                    doc_metadata=doc_metadata,
-                    vector_store=vector_store
-                )
-                results["success"].append(filename)
-            elif is_valid_image(filename):
-                process_single_image(file_path, output_dir, vector_store)
-                results["success"].append(filename)
-                
-        except Exception as e:
-            results["failed"].append({"file": filename, "error": str(e)})
-            logger.error(f"Error processing {filename}: {e}")
+    file_paths = [os.path.join(input_dir, filename) for filename in os.listdir(input_dir)]
+
+    for file_path, details, error, _ in ingest_files(file_paths, output_dir, vector_store, max_workers,
+                                                     scope=os.path.abspath(input_dir)):
+        filename = os.path.basename(file_path)
+        if error is not None:
+            results["failed"].append({"file": filename, "error": str(error)})
+            logger.error(f"Error processing {filename}: {error}")
+        elif details is not None:
+            results["success"].append(filename)
     
     return results
 
-def process_single_image(file_path: str, output_dir: str, vector_store: VectorStore) -> None:
+def process_single_image(file_path, output_dir: str, vector_store: VectorStore,
+                         doc_id: str = None, save_artifacts: bool = None, timer=None) -> dict:
     """Process a single image file and store its analysis"""
+    timer = timer or NullTimer()
     img_metadata = create_metadata(file_path, "standalone_image")
-    output_file = os.path.join(output_dir, "standalone_images_analysis.txt")
-    
-    with Image.open(file_path).convert("RGB") as img:
-        source_info = f"[Standalone Image: {img_metadata['filename']}]"
-        process_image_and_save(img, output_file, source_info)
-        
-        with open(output_file, 'r', encoding='utf-8') as f:
-            image_content = f.read()
-            
-        vector_store.store_document_content(
-            doc_id=get_document_id(file_path),
-            content=image_content,
-            content_type="image",
-            source_info=source_info,
+    source_info = f"[Standalone Image: {img_metadata['filename']}]"
+
+    with timer.stage("extract"):
+        image_bytes = read_source(file_path)
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+        doc_id = doc_id or get_document_id(image_hash)
+        img = decode_image(image_bytes)
+    with img, timer.stage("image_analysis"):
+        description = describe_images([{"image": img, "source_info": source_info, "hash": image_hash}])[0]
+    if description is None:
+        # Nothing is recorded, so the next upload of the image tries again
+        raise RuntimeError("OCR or captioning failed")
+    records = [{"page": None, "kind": "image", "text": description}]
+
+    if save_artifacts is None:
+        save_artifacts = SAVE_EXTRACTED_ARTIFACTS
+    if save_artifacts:
+        output_file = os.path.join(output_dir, "standalone_images_analysis.txt")
+        with open(output_file, 'a', encoding='utf-8') as f:
+            f.write(records[0]["text"] + "\n" + ARTIFACT_FILES["image"][1])
+
+    with timer.stage("embed"):
+        chunks, failed_chunks = vector_store.store_records(
+            doc_id=doc_id,
+            records=records,
             metadata=img_metadata
         )
+    return {"chunks": chunks, "failed_chunks": failed_chunks}
 
 def process_image_files(images_dir: str, output_dir: str) -> dict:
-    """Process all images in a directory"""
-    vector_store = VectorStore()
+    """Process all images in a directory, keyed by their path"""
+    vector_store = get_vector_store()
     os.makedirs(output_dir, exist_ok=True)
     
     results = {"success": [], "failed": []}
@@ -103,7 +301,8 @@ def process_image_files(images_dir: str, output_dir: str) -> dict:
         if is_valid_image(filename):
             try:
                 img_path = os.path.join(images_dir, filename)
-                process_single_image(img_path, output_dir, vector_store)
+                ingest_file(img_path, output_dir, vector_store,
+                            document_key=get_document_key(img_path, os.path.abspath(images_dir)))
                 results["success"].append(filename)
                 logger.info(f"✓ Stored standalone image: {filename}")
             except Exception as e:
@@ -125,83 +324,184 @@ def store_document_content(vector_store, doc_id, content_path, content_type, doc
                 metadata=doc_metadata
             )
 
-def process_single_document(file_path, doc_output_dir, doc_id, doc_metadata, vector_store):
-    """Extract text, tables, and images from a document and store them in the vector store."""
+def _describe_image_records(pending, timer, failures: list):
+    """
+    Caption a batch of pending (page, fingerprint, image entry) tuples and yield their records.
+    Images whose OCR or captioning failed, or the whole batch when the analysis
+    raises, are added to failures instead.
+    """
+    try:
+        with timer.stage("image_analysis"):
+            descriptions = describe_images([entry for _, _, entry in pending])
+    except Exception as e:
+        logger.error(f"Error processing {len(pending)} images: {e}")
+        descriptions, error = [None] * len(pending), str(e)
+    else:
+        error = "OCR or captioning failed"
+    for (page, fingerprint, entry), description in zip(pending, descriptions):
+        if description is None:
+            failures.append({
+                "chunk_id": None,
+                "content_type": "image",
+                "page": page,
+                "chunk_index": None,
+                "stage": "image_analysis",
+                "error": f"{entry['source_info']}: {error}",
+            })
+            continue
+        yield {"page": page, "kind": "image", "text": description, "fingerprint": fingerprint}
+
+def iter_document_records(file_path, triage: ImageTriage = None, pages: set = None,
+                          fingerprints: dict = None, timer=None, failures: list = None):
+    """
+    Parse a document and yield its content as records of the form
+    {"page": ..., "kind": "text" | "table" | "image", "text": ...}, page by page.
+    Images are queued and analysed CAPTION_BATCH_SIZE at a time, so image records
+    trail the text and table records of the pages they come from.
+    When a triage is given, decorative and near-duplicate images are dropped first.
+    Only the given pages are parsed when pages is set, and records carry their
+    page's 'fingerprint' when fingerprints are given.
+    Images that could not be analysed are added to failures, when given, like
+    the failed chunks of the vector store.
+    """
+    timer = timer or NullTimer()
+    fingerprints = fingerprints or {}
+    failures = failures if failures is not None else []
+    pending = []
+    for page in parse_document_by_format(file_path, pages=pages):
+        fingerprint = fingerprints.get(page["page"])
+        if page["text"]:
+            yield {"page": page["page"], "kind": "text", "text": page["text"], "fingerprint": fingerprint}
+        for table_text in page["tables"]:
+            yield {"page": page["page"], "kind": "table", "text": table_text, "fingerprint": fingerprint}
+        images = triage.filter(page["images"]) if triage is not None else page["images"]
+        pending.extend((page["page"], fingerprint, entry) for entry in images)
+        if len(pending) >= CAPTION_BATCH_SIZE:
+            yield from _describe_image_records(pending, timer, failures)
+            pending = []
+    if pending:
+        yield from _describe_image_records(pending, timer, failures)
+
+def save_record_artifacts(records, doc_output_dir):
+    """
+    Pass records through unchanged while writing them to the extracted_data
+    text files (extracted_text.txt, tables.txt, image_analysis.txt).
+    """
     os.makedirs(doc_output_dir, exist_ok=True)
-    
-    # Process text content
-    extract_text_by_format(file_path, doc_output_dir)
-    store_document_content(
-        vector_store,
-        doc_id,
-        os.path.join(doc_output_dir, "extracted_text.txt"),
-        "text",
-        doc_metadata
-    )
-
-    # Process tables
-    extract_tables_by_format(file_path, doc_output_dir)
-    store_document_content(
-        vector_store,
-        doc_id,
-        os.path.join(doc_output_dir, "tables.txt"),
-        "table",
-        doc_metadata
-    )
-
-    # Process images
-    extract_images_by_format(file_path, doc_output_dir)
-    store_document_content(
-        vector_store,
-        doc_id,
-        os.path.join(doc_output_dir, "image_analysis.txt"),
-        "image",
-        doc_metadata
-    )
-
-def add_new_documents(input_files: list, output_dir: str) -> dict:
-    """Process a list of new documents"""
-    vector_store = VectorStore()
+    for filename, _ in ARTIFACT_FILES.values():
+        path = os.path.join(doc_output_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    handles = {}
+    try:
+        # The text file is always written, even when the document has no text
+        handles["text"] = open(os.path.join(doc_output_dir, "extracted_text.txt"), 'w', encoding='utf-8')
+        written = set()
+        for record in records:
+            kind = record["kind"]
+            filename, separator = ARTIFACT_FILES[kind]
+            if kind not in handles:
+                handles[kind] = open(os.path.join(doc_output_dir, filename), 'w', encoding='utf-8')
+            if kind in written:
+                handles[kind].write(separator)
+            handles[kind].write(record["text"])
+            written.add(kind)
+            yield record
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+def process_single_document(file_path, doc_output_dir, doc_id, doc_metadata, vector_store,
+                            save_artifacts: bool = None, pages: set = None, fingerprints: dict = None,
+                            timer=None):
+    """
+    Extract text, tables, and images from a document and stream them into the vector store.
+    Only the given pages are processed when pages is set, and their chunks are tagged
+    with the page fingerprints when given.
+    The extracted content is also written under doc_output_dir when save_artifacts is set
+    (defaults to the SAVE_EXTRACTED_ARTIFACTS environment variable); with pages set, the
+    artifacts only hold the processed pages.
+    Returns processing details: the stored (page, chunk_id) pairs, the chunks and
+    images that could not be stored and how many images triage skipped and why.
+    Time is split on timer between extraction, image analysis and embedding, even
+    though the three are interleaved.
+    """
+    if save_artifacts is None:
+        save_artifacts = SAVE_EXTRACTED_ARTIFACTS
+    timer = timer or NullTimer()
+
+    triage = ImageTriage()
+    analysis_failures = []
+    records = iter_document_records(file_path, triage, pages=pages, fingerprints=fingerprints, timer=timer,
+                                    failures=analysis_failures)
+    records = timer.timed_iter(records, "extract")
+    if save_artifacts:
+        records = save_record_artifacts(records, doc_output_dir)
+
+    with timer.stage("embed"):
+        chunks, failed_chunks = vector_store.store_records(doc_id=doc_id, records=records, metadata=doc_metadata)
+    failed_chunks = analysis_failures + failed_chunks
+
+    triage_report = triage.report()
+    if triage_report["images_skipped"]:
+        logger.info(
+            f"Image triage for {doc_metadata['filename']}: skipped {triage_report['images_skipped']}"
+            f" of {triage_report['images_found']} images {triage_report['skipped_by_reason']}"
+        )
+    return {"chunks": chunks, "failed_chunks": failed_chunks, "image_triage": triage_report}
+
+def add_new_documents(input_files: list, output_dir: str, max_workers: int = None,
+                      progress=None, scope: str = None) -> dict:
+    """
+    Process a list of new documents (paths or SpooledUploads), up to max_workers at a time.
+    progress(filename, update) receives per-file status and stage updates when given.
+    Files uploaded again under the same scope and name replace their earlier version.
+    """
+    vector_store = get_vector_store()
     results = {
         "success": [], 
         "failed": [],
-        "timing": []  # Add timing information
+        "documents": [],  # Document ID of each processed file, to filter searches on
+        "timing": [],  # Add timing information
+        "skipped": [],  # Files whose content was already ingested
+        "image_triage": [],
+        "failed_chunks": []  # Chunks and images of processed files that could not be analysed, embedded or written
     }
     
-    for file_path in input_files:
-        filename = os.path.basename(file_path)
-        start_time = time.time()
-        
-        try:
-            if is_valid_document(filename):
-                doc_metadata = create_metadata(file_path, "document")
-                process_single_document(
-                    file_path=file_path,
-                    doc_output_dir=os.path.join(output_dir, os.path.splitext(filename)[0]),
-                    doc_id=get_document_id(file_path),
-                    doc_metadata=doc_metadata,
-                    vector_store=vector_store
-                )
-                results["success"].append(filename)
-            elif is_valid_image(filename):
-                process_single_image(file_path, output_dir, vector_store)
-                results["success"].append(filename)
-            
-            # Record processing time
-            processing_time = time.time() - start_time
-            results["timing"].append({
-                "file": filename,
-                "processing_time_seconds": round(processing_time, 2)
-            })
-                
-        except Exception as e:
-            processing_time = time.time() - start_time
+    for file_path, details, error, processing_time in ingest_files(
+            input_files, output_dir, vector_store, max_workers, progress, scope):
+        filename = source_name(file_path)
+
+        if error is not None:
             results["failed"].append({
                 "file": filename, 
-                "error": str(e),
+                "error": str(error),
                 "processing_time_seconds": round(processing_time, 2)
             })
-            logger.error(f"Error processing {filename} ({processing_time:.2f}s): {e}")
+            logger.error(f"Error processing {filename} ({processing_time:.2f}s): {error}")
+            continue
+
+        if details is not None:
+            results["success"].append(filename)
+            results["documents"].append({"file": filename, "doc_id": details["doc_id"]})
+        if details and details.get("skipped"):
+            results["skipped"].append(filename)
+        if details and "image_triage" in details:
+            results["image_triage"].append({"file": filename, **details["image_triage"]})
+        if details and details.get("failed_chunks"):
+            results["failed_chunks"].extend({"file": filename, **failure} for failure in details["failed_chunks"])
+
+        # Record processing time
+        timing = {
+            "file": filename,
+            "processing_time_seconds": round(processing_time, 2)
+        }
+        if details and details.get("stages"):
+            timing["stages_seconds"] = details["stages"]
+        if details and "pages_total" in details:
+            timing["pages_processed"] = details["pages_processed"]
+            timing["pages_total"] = details["pages_total"]
+        results["timing"].append(timing)
     
     return results
-
@@ -0,0 +1,369 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+from src.services.documents_pipeline import add_new_documents
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SQLite file holding the ingestion job queue, shared by the API and worker processes on one host
+INGESTION_JOBS_PATH = os.getenv(
+    "INGESTION_JOBS_PATH", os.path.join(PROJECT_ROOT, "data", "jobs", "ingestion_jobs.sqlite")
+)
+# Uploaded files wait here, one folder per job, until the job has run
+INGESTION_JOB_FILES_DIR = os.getenv(
+    "INGESTION_JOB_FILES_DIR", os.path.join(PROJECT_ROOT, "uploads", "jobs")
+)
+INGESTION_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "data", "extracted_data")
+# Jobs run at the same time by one process (0 leaves the jobs to separate worker processes)
+INGESTION_JOB_WORKERS = int(os.getenv("INGESTION_JOB_WORKERS", "1"))
+# Seconds between queue polls of an idle worker
+INGESTION_JOB_POLL_SECONDS = float(os.getenv("INGESTION_JOB_POLL_SECONDS", "2"))
+# A running job whose worker has not checked in for this long is considered lost and requeued
+INGESTION_JOB_STALE_SECONDS = float(os.getenv("INGESTION_JOB_STALE_SECONDS", "120"))
+# Times a job is started before it is given up on
+INGESTION_JOB_MAX_ATTEMPTS = int(os.getenv("INGESTION_JOB_MAX_ATTEMPTS", "3"))
+# Minimum seconds between progress saves of a job; a file starting or finishing is always saved
+INGESTION_JOB_PROGRESS_SECONDS = float(os.getenv("INGESTION_JOB_PROGRESS_SECONDS", "1"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class JobStore:
+    """
+    Persistent queue of document ingestion jobs backed by SQLite.
+
+    A job holds the uploaded files to ingest, per-file progress (status, current
+    stage and per-stage timings) and, once done, the results of add_new_documents.
+    Workers send heartbeats while running a job, so jobs left running by a
+    worker that died are put back in the queue.
+    """
+
+    def __init__(self, path: str = INGESTION_JOBS_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, files TEXT NOT NULL, "
+            "progress TEXT NOT NULL, results TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+            "worker TEXT, created REAL NOT NULL, started REAL, finished REAL, heartbeat REAL)"
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if "scope" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN scope TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs(status, created)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, since sqlite3 connections are not shareable."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job_id: str, file_paths: list, scope: str = None) -> None:
+        progress = {os.path.basename(path): {"status": "queued"} for path in file_paths}
+        self._connection().execute(
+            "INSERT INTO jobs (job_id, status, files, progress, scope, created) VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, json.dumps(file_paths), json.dumps(progress), scope, time.time())
+        )
+
+    def claim(self, worker: str):
+        """Mark the oldest queued job as running on worker and return it, or None if the queue is empty."""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started = ?, heartbeat = ?, "
+                "attempts = attempts + 1 WHERE job_id = ?",
+                (worker, now, now, row["job_id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["job_id"])
+
+    def update_progress(self, job_id: str, progress: dict) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET progress = ?, heartbeat = ? WHERE job_id = ?",
+            (json.dumps(progress), time.time(), job_id)
+        )
+
+    def heartbeat(self, job_ids: list) -> None:
+        now = time.time()
+        self._connection().executemany(
+            "UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND status = 'running'",
+            [(now, job_id) for job_id in job_ids]
+        )
+
+    def finish(self, job_id: str, results: dict = None, error: str = None) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, results = ?, error = ?, finished = ? WHERE job_id = ?",
+            ("failed" if error else "succeeded", json.dumps(results) if results is not None else None,
+             error, time.time(), job_id)
+        )
+
+    def requeue_stale(self, stale_after: float = INGESTION_JOB_STALE_SECONDS,
+                      max_attempts: int = INGESTION_JOB_MAX_ATTEMPTS) -> int:
+        """
+        Put running jobs whose worker stopped sending heartbeats back in the queue,
+        or fail them once they used up max_attempts. Returns how many were requeued.
+        """
+        conn = self._connection()
+        cutoff = time.time() - stale_after
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', finished = ?, "
+                "error = 'Worker stopped while running the job' "
+                "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (time.time(), cutoff, max_attempts)
+            )
+            requeued = conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND heartbeat < ?",
+                (cutoff,)
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return requeued
+
+    def get(self, job_id: str):
+        """Return the job as a dict, or None if there is no such job."""
+        row = self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["files"] = json.loads(job["files"])
+        job["progress"] = json.loads(job["progress"])
+        job["results"] = json.loads(job["results"]) if job["results"] else None
+        return job
+
+    def counts(self) -> dict:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in JOB_STATUSES}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    """Return the job store shared by the process, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
+
+
+def new_job_folder():
+    """Create the folder a new job's uploads are saved to and return (job_id, folder)."""
+    job_id = uuid.uuid4().hex
+    folder = os.path.join(INGESTION_JOB_FILES_DIR, job_id)
+    os.makedirs(folder, exist_ok=True)
+    return job_id, folder
+
+
+def submit_job(job_id: str, file_paths: list, scope: str = None) -> None:
+    """Queue the saved uploads of a job and wake up a local worker if there is one."""
+    get_job_store().enqueue(job_id, file_paths, scope)
+    if _pool is not None:
+        _pool.wake()
+
+
+def get_job(job_id: str):
+    """Return a job's status, per-file progress and results, or None if it does not exist."""
+    job = get_job_store().get(job_id)
+    if job is None:
+        return None
+    job["files"] = [os.path.basename(path) for path in job["files"]]
+    if job["started"]:
+        job["elapsed_seconds"] = round((job["finished"] or time.time()) - job["started"], 2)
+    del job["heartbeat"]
+    return job
+
+
+class JobProgress:
+    """
+    Collects per-file progress reported by the pipeline and saves it to the job.
+    Stage changes are saved at most every interval seconds, while a file changing
+    status (starting, finishing or failing) is saved right away; flush() saves
+    whatever is left once the job is done.
+    """
+
+    def __init__(self, store: JobStore, job: dict, interval: float = INGESTION_JOB_PROGRESS_SECONDS):
+        self.store = store
+        self.job_id = job["job_id"]
+        self.files = job["progress"]
+        self.interval = interval
+        self._saved = 0.0
+        self._pending = False
+        self._lock = threading.Lock()
+
+    def __call__(self, filename: str, update: dict) -> None:
+        with self._lock:
+            entry = self.files.setdefault(filename, {})
+            status_changed = update.get("status", entry.get("status")) != entry.get("status")
+            entry.update(update)
+            self._pending = True
+            if status_changed or time.monotonic() - self._saved >= self.interval:
+                self._save()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pending:
+                self._save()
+
+    def _save(self) -> None:
+        self.store.update_progress(self.job_id, self.files)
+        self._saved = time.monotonic()
+        self._pending = False
+
+
+class IngestionWorkerPool:
+    """
+    Threads taking jobs off the queue and running them through add_new_documents.
+    Also requeues jobs lost by dead workers and keeps the heartbeat of its own
+    running jobs fresh.
+    """
+
+    def __init__(self, output_dir: str = INGESTION_OUTPUT_DIR, workers: int = INGESTION_JOB_WORKERS,
+                 poll_seconds: float = INGESTION_JOB_POLL_SECONDS):
+        self.output_dir = output_dir
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self) -> None:
+        store = get_job_store()
+        requeued = store.requeue_stale()
+        if requeued:
+            logger.info(f"Requeued {requeued} ingestion jobs left running by a stopped worker")
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ingestion-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._keep_alive, name="ingestion-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _keep_alive(self) -> None:
+        interval = max(1.0, INGESTION_JOB_STALE_SECONDS / 4)
+        while not self._stop.wait(interval):
+            try:
+                store = get_job_store()
+                with self._running_lock:
+                    running = list(self._running)
+                store.heartbeat(running)
+                store.requeue_stale()
+            except Exception as e:
+                logger.error(f"Error updating ingestion job heartbeats: {e}")
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = get_job_store().claim(self.name)
+            except Exception as e:
+                logger.error(f"Error claiming an ingestion job: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+                continue
+            self.run_job(job)
+
+    def run_job(self, job: dict) -> None:
+        store = get_job_store()
+        job_id = job["job_id"]
+        with self._running_lock:
+            self._running.add(job_id)
+        logger.info(f"Running ingestion job {job_id} ({len(job['files'])} files)")
+        try:
+            files = [path for path in job["files"] if os.path.exists(path)]
+            if not files:
+                raise FileNotFoundError("The uploaded files of this job are no longer available")
+            progress = JobProgress(store, job)
+            try:
+                results = add_new_documents(files, self.output_dir, progress=progress, scope=job.get("scope"))
+            finally:
+                progress.flush()
+            store.finish(job_id, results=results)
+            logger.info(f"Ingestion job {job_id} finished")
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+            store.finish(job_id, error=str(e))
+        finally:
+            with self._running_lock:
+                self._running.discard(job_id)
+            shutil.rmtree(os.path.join(INGESTION_JOB_FILES_DIR, job_id), ignore_errors=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def start_ingestion_workers(output_dir: str = INGESTION_OUTPUT_DIR, workers: int = None):
+    """
+    Start the local worker pool (INGESTION_JOB_WORKERS threads by default) once
+    per process. Returns the pool, or None when workers is 0.
+    """
+    global _pool
+    workers = INGESTION_JOB_WORKERS if workers is None else workers
+    with _pool_lock:
+        if _pool is None and workers > 0:
+            _pool = IngestionWorkerPool(output_dir, workers)
+            _pool.start()
+        return _pool
+
+
+if __name__ == "__main__":
+    # Standalone ingestion worker: python -m src.services.ingestion_jobs
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    pool = start_ingestion_workers(workers=max(1, INGESTION_JOB_WORKERS))
+    logger.info(f"Ingestion worker {pool.name} running with {pool.workers} threads")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,201 @@
+import os
+import re
+import threading
+
+# Largest chunk, in tokens of the embedding model
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+# Tokens of trailing sentences repeated at the start of the next chunk of the same section
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+# Hugging Face tokenizer used to count tokens (e.g. nvidia/NV-Embed-v1); empty uses a fast estimate
+CHUNK_TOKENIZER = os.getenv("CHUNK_TOKENIZER", "")
+# A chunk at least this full ends early before a sentence opening with a transition word
+CHUNK_SOFT_BREAK_RATIO = float(os.getenv("CHUNK_SOFT_BREAK_RATIO", "0.5"))
+
+# Lines starting a new section: extraction markers and markdown headers
+_SECTION_START = re.compile(r"^[ \t]*(?:\[(?:PDF Page|PPTX Slide|DOCX)\b|#{1,6} )", re.MULTILINE)
+# Extraction marker repeated at the start of every chunk of its section, e.g. "[PDF Page 3 - Table 1]"
+_SECTION_MARKER = re.compile(r"\A[ \t]*(\[(?:PDF Page|PPTX Slide|DOCX)\b[^\]\n]*\])")
+# Sentence ends: terminal punctuation (and closing quotes or brackets) followed by whitespace
+# and the start of a new sentence, so decimals, URLs, file names and dotted code stay whole
+_SENTENCE_END = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+(?=[\"'(\[A-Z0-9])")
+_LINE_BREAK = re.compile(r"\s*\n\s*")
+_TRANSITION = re.compile(r"(?:However|Moreover|Furthermore|In conclusion|Therefore|Finally),")
+# Word pieces of the token estimate: runs of letters/digits and single punctuation marks
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the subword token count of text without a tokenizer: one token per
+    punctuation mark and one per started 4 characters of each word, which tracks
+    BPE tokenizers on English prose and code closely enough for sizing chunks.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PIECE.findall(text))
+
+
+_token_counter = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter():
+    """
+    Return the function counting tokens for chunk sizing: the CHUNK_TOKENIZER
+    tokenizer when one is configured and loads, otherwise estimate_tokens.
+    """
+    global _token_counter
+    with _token_counter_lock:
+        if _token_counter is None:
+            _token_counter = estimate_tokens
+            if CHUNK_TOKENIZER:
+                try:
+                    from transformers import AutoTokenizer
+                    tokenizer = AutoTokenizer.from_pretrained(CHUNK_TOKENIZER)
+                    _token_counter = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+                except Exception as e:
+                    print(f"Error loading tokenizer {CHUNK_TOKENIZER}, estimating token counts instead: {e}")
+        return _token_counter
+
+
+class TextChunker:
+    """
+    Splits extracted text into chunks of at most max_tokens tokens.
+
+    Text is first cut into sections at extraction markers ("[PDF Page", "[PPTX Slide",
+    "[DOCX") and markdown headers, which chunks never cross. Each section is cut into
+    sentences with precompiled patterns and the sentences are packed greedily, each
+    counted once, so the work is linear in the length of the text. Consecutive chunks
+    of a section share up to overlap_tokens of trailing sentences, and chunks after the
+    first repeat the section's marker so every chunk says where it comes from.
+    Sentences longer than a chunk are split at line breaks, then between words.
+    Chunks are slices of the original text, so line breaks inside tables survive.
+    """
+
+    def __init__(self, max_tokens: int = None, overlap_tokens: int = None, count_tokens=None,
+                 soft_break_ratio: float = None):
+        self.max_tokens = max(1, max_tokens or CHUNK_MAX_TOKENS)
+        overlap_tokens = CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        # Overlap must leave room for new content in every chunk
+        self.overlap_tokens = max(0, min(overlap_tokens, self.max_tokens // 2))
+        self.count_tokens = count_tokens or get_token_counter()
+        self.soft_break_ratio = CHUNK_SOFT_BREAK_RATIO if soft_break_ratio is None else soft_break_ratio
+
+    def split(self, text: str) -> list:
+        """Return the chunks of text in order."""
+        chunks = []
+        for section in self._sections(text):
+            chunks.extend(self._split_section(section))
+        return chunks
+
+    def _sections(self, text: str):
+        starts = [match.start() for match in _SECTION_START.finditer(text)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        starts.append(len(text))
+        for start, end in zip(starts, starts[1:]):
+            section = text[start:end].strip()
+            if section:
+                yield section
+
+    @staticmethod
+    def _spans(text: str, separator, start: int, end: int):
+        """Yield the (start, end) spans of text[start:end] between separator matches, trimmed."""
+        position = start
+        for match in separator.finditer(text, start, end):
+            if match.start() > position:
+                yield position, match.start()
+            position = match.end()
+        if end > position:
+            yield position, end
+
+    def _units(self, section: str, budget: int):
+        """Yield (start, end, tokens) spans of the section's sentences, none above budget."""
+        count = self.count_tokens
+        section_start, section_end = 0, len(section)
+        for start, end in self._spans(section, _SENTENCE_END, section_start, section_end):
+            tokens = count(section[start:end])
+            if tokens <= budget:
+                yield start, end, tokens
+                continue
+            # Tables and run-on text: fall back to lines, then words
+            for line_start, line_end in self._spans(section, _LINE_BREAK, start, end):
+                line_tokens = count(section[line_start:line_end])
+                if line_tokens <= budget:
+                    yield line_start, line_end, line_tokens
+                else:
+                    yield from self._split_words(section, line_start, line_end, budget)
+
+    def _split_words(self, section: str, start: int, end: int, budget: int):
+        count = self.count_tokens
+        run_start = run_end = None
+        run_tokens = 0
+        for word_start, word_end in self._spans(section, _WHITESPACE, start, end):
+            word_tokens = count(section[word_start:word_end])
+            if word_tokens > budget:
+                # A single word larger than a chunk (encoded data, long identifiers)
+                if run_start is not None:
+                    yield run_start, run_end, run_tokens
+                    run_start = None
+                step = max(1, (word_end - word_start) * budget // word_tokens)
+                for piece_start in range(word_start, word_end, step):
+                    piece_end = min(piece_start + step, word_end)
+                    yield piece_start, piece_end, count(section[piece_start:piece_end])
+                continue
+            if run_start is not None and run_tokens + word_tokens > budget:
+                yield run_start, run_end, run_tokens
+                run_start = None
+            if run_start is None:
+                run_start, run_tokens = word_start, 0
+            run_end = word_end
+            run_tokens += word_tokens
+        if run_start is not None:
+            yield run_start, run_end, run_tokens
+
+    def _split_section(self, section: str) -> list:
+        marker_match = _SECTION_MARKER.match(section)
+        marker = marker_match.group(1) if marker_match else None
+        marker_tokens = self.count_tokens(marker) if marker else 0
+        # Keep every sentence small enough to follow the repeated marker
+        budget = max(1, self.max_tokens - marker_tokens)
+
+        chunks = []
+        units = []
+        tokens_so_far = 0
+        for unit in self._units(section, budget):
+            tokens = unit[2]
+            soft_break = (
+                tokens_so_far >= self.max_tokens * self.soft_break_ratio
+                and _TRANSITION.match(section, unit[0])
+            )
+            if units and (tokens_so_far + tokens > self.max_tokens or soft_break):
+                chunks.append(self._chunk_text(section, units, marker if chunks else None))
+                units = self._overlap(units, budget - tokens)
+                tokens_so_far = marker_tokens + sum(unit_tokens for _, _, unit_tokens in units)
+            units.append(unit)
+            tokens_so_far += tokens
+        if units:
+            chunks.append(self._chunk_text(section, units, marker if chunks else None))
+        return chunks
+
+    def _overlap(self, previous: list, room: int) -> list:
+        """The trailing units of the previous chunk repeated at the start of the next one."""
+        budget = min(self.overlap_tokens, room)
+        tail, tail_tokens = [], 0
+        for unit in reversed(previous):
+            # Never repeat the section's first unit, which holds the marker itself
+            if unit[0] == 0 or tail_tokens + unit[2] > budget:
+                break
+            tail.append(unit)
+            tail_tokens += unit[2]
+        tail.reverse()
+        return tail
+
+    @staticmethod
+    def _chunk_text(section: str, units: list, marker) -> str:
+        body = section[units[0][0]:units[-1][1]]
+        return f"{marker}\n{body}" if marker else body
+
+
+def chunk_text(text: str, max_tokens: int = None, overlap_tokens: int = None) -> list:
+    """Split text into chunks with a TextChunker using the configured sizes."""
+    return TextChunker(max_tokens, overlap_tokens).split(text)
@@ -0,0 +1,146 @@
+import os
+from qdrant_client.http import models
+
+# HNSW graph: links per node and candidates kept while building; more means better recall, more RAM
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", "16"))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "128"))
+# Candidates explored per search (0 lets Qdrant choose)
+QDRANT_SEARCH_HNSW_EF = int(os.getenv("QDRANT_SEARCH_HNSW_EF", "128"))
+# Vector quantization: scalar (int8, 4x smaller), binary (32x smaller, for large embedding models) or none
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "scalar").strip().lower()
+# Re-rank quantized candidates with the original vectors, fetching oversampling times the limit
+QDRANT_QUANTIZATION_RESCORE = os.getenv("QDRANT_QUANTIZATION_RESCORE", "true").lower() == "true"
+QDRANT_QUANTIZATION_OVERSAMPLING = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", "2.0"))
+# Keep the original vectors and the payload on disk, leaving the quantized vectors and the graph in RAM
+QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "true").lower() == "true"
+QDRANT_PAYLOAD_ON_DISK = os.getenv("QDRANT_PAYLOAD_ON_DISK", "true").lower() == "true"
+# Create collections with BM25 sparse vectors for hybrid search (existing collections can't gain them)
+QDRANT_SPARSE_VECTORS = os.getenv("QDRANT_SPARSE_VECTORS", "true").lower() == "true"
+
+# Name of the sparse BM25 vector of each chunk
+SPARSE_VECTOR_NAME = "bm25"
+
+# Chunk metadata fields filtered on by ingestion and search, as stored by QdrantVectorStore
+PAYLOAD_INDEXES = {
+    "metadata.doc_id": models.PayloadSchemaType.KEYWORD,
+    "metadata.content_type": models.PayloadSchemaType.KEYWORD,
+    "metadata.file_type": models.PayloadSchemaType.KEYWORD,
+    "metadata.page": models.PayloadSchemaType.INTEGER,
+    "metadata.chunk_index": models.PayloadSchemaType.INTEGER,
+    "metadata.added_date": models.PayloadSchemaType.DATETIME,
+}
+
+
+def _quantization_kind(config) -> str:
+    if isinstance(config, models.ScalarQuantization):
+        return "scalar"
+    if isinstance(config, models.BinaryQuantization):
+        return "binary"
+    if isinstance(config, models.ProductQuantization):
+        return "product"
+    return "none"
+
+
+class CollectionProfile:
+    """
+    The storage and index settings of the chunk collection: HNSW parameters,
+    quantization with rescoring, on-disk vectors and payload, payload indexes, and the
+    sparse BM25 vectors used by hybrid search.
+
+    create() builds a collection with the profile, and migrate() brings an existing
+    one in line with it, so changing a setting only takes a restart. Qdrant rebuilds
+    indexes and quantized vectors in the background while searches keep running.
+    """
+
+    def __init__(self, hnsw_m: int = None, hnsw_ef_construct: int = None, search_hnsw_ef: int = None,
+                 quantization: str = None, rescore: bool = None, oversampling: float = None,
+                 vectors_on_disk: bool = None, payload_on_disk: bool = None, payload_indexes: dict = None,
+                 sparse_vectors: bool = None):
+        self.hnsw_m = QDRANT_HNSW_M if hnsw_m is None else hnsw_m
+        self.hnsw_ef_construct = QDRANT_HNSW_EF_CONSTRUCT if hnsw_ef_construct is None else hnsw_ef_construct
+        self.search_hnsw_ef = QDRANT_SEARCH_HNSW_EF if search_hnsw_ef is None else search_hnsw_ef
+        self.quantization = QDRANT_QUANTIZATION if quantization is None else quantization
+        if self.quantization not in ("scalar", "binary", "none"):
+            raise ValueError(f"Unknown quantization: {self.quantization} (expected scalar, binary or none)")
+        self.rescore = QDRANT_QUANTIZATION_RESCORE if rescore is None else rescore
+        self.oversampling = QDRANT_QUANTIZATION_OVERSAMPLING if oversampling is None else oversampling
+        self.vectors_on_disk = QDRANT_VECTORS_ON_DISK if vectors_on_disk is None else vectors_on_disk
+        self.payload_on_disk = QDRANT_PAYLOAD_ON_DISK if payload_on_disk is None else payload_on_disk
+        self.payload_indexes = PAYLOAD_INDEXES if payload_indexes is None else payload_indexes
+        self.sparse_vectors = QDRANT_SPARSE_VECTORS if sparse_vectors is None else sparse_vectors
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct)
+
+    def quantization_config(self):
+        """Quantization settings; the quantized vectors always stay in RAM"""
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+            ))
+        if self.quantization == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    def search_params(self) -> models.SearchParams:
+        """Parameters for every search of the collection"""
+        quantization = None
+        if self.quantization != "none":
+            quantization = models.QuantizationSearchParams(rescore=self.rescore, oversampling=self.oversampling)
+        return models.SearchParams(hnsw_ef=self.search_hnsw_ef or None, quantization=quantization)
+
+    def create(self, client, collection_name: str, vector_size: int, vector_name: str = "",
+               distance: models.Distance = models.Distance.COSINE) -> None:
+        """Create the collection with this profile and its payload indexes"""
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config={vector_name: models.VectorParams(
+                size=vector_size, distance=distance, on_disk=self.vectors_on_disk
+            )},
+            # Qdrant weighs sparse terms by their inverse document frequency at query time
+            sparse_vectors_config={
+                SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)
+            } if self.sparse_vectors else None,
+            hnsw_config=self.hnsw_config(),
+            quantization_config=self.quantization_config(),
+            on_disk_payload=self.payload_on_disk
+        )
+        self._create_payload_indexes(client, collection_name, {})
+
+    def migrate(self, client, collection_name: str, vector_name: str = "") -> list:
+        """Update an existing collection to this profile; returns the settings that changed"""
+        info = client.get_collection(collection_name)
+        config = info.config
+        changes = {}
+
+        hnsw = config.hnsw_config
+        if hnsw.m != self.hnsw_m or hnsw.ef_construct != self.hnsw_ef_construct:
+            changes["hnsw_config"] = self.hnsw_config()
+
+        if _quantization_kind(config.quantization_config) != self.quantization:
+            changes["quantization_config"] = self.quantization_config() or models.Disabled.DISABLED
+
+        vectors = config.params.vectors
+        params = vectors.get(vector_name) if isinstance(vectors, dict) else vectors
+        if params is not None and bool(params.on_disk) != self.vectors_on_disk:
+            changes["vectors_config"] = {vector_name: models.VectorParamsDiff(on_disk=self.vectors_on_disk)}
+
+        if bool(config.params.on_disk_payload) != self.payload_on_disk:
+            changes["collection_params"] = models.CollectionParamsDiff(on_disk_payload=self.payload_on_disk)
+
+        if changes:
+            client.update_collection(collection_name=collection_name, **changes)
+        created = self._create_payload_indexes(client, collection_name, info.payload_schema or {})
+        return list(changes) + [f"index:{field}" for field in created]
+
+    def _create_payload_indexes(self, client, collection_name: str, existing: dict) -> list:
+        created = []
+        for field, schema in self.payload_indexes.items():
+            if field in existing:
+                continue
+            # Indexes build in the background; filters work meanwhile, only slower
+            client.create_payload_index(
+                collection_name=collection_name, field_name=field, field_schema=schema, wait=False
+            )
+            created.append(field)
+        return created
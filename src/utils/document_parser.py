@@ -0,0 +1,284 @@
+import os
+import re
+import hashlib
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .text_extractor import pdf_page_text, docx_text, pptx_slide_text
+from .table_extractor import pdf_page_tables, docx_tables, pptx_slide_tables
+from .image_extractor import (decode_image, pdf_page_images, pptx_slide_images, docx_images,
+                              pdf_image_owners, pptx_image_owners)
+from .spooled_upload import open_source, open_pdf_document, source_name, source_on_disk
+
+# Number of worker processes used to parse PDF pages in parallel (1 = parse in-process)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1"))
+# Number of consecutive pages handed to a worker at a time
+PDF_PAGES_PER_SHARD = int(os.getenv("PDF_PAGES_PER_SHARD", "8"))
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool(workers):
+    """
+    Return the process pool shared by all PDF parses, creating it on first use.
+    Workers are spawned rather than forked: the server process runs threads and may
+    hold loaded models, neither of which survives a fork safely.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pdf_pool
+
+
+def _iter_pdf_pages(pdf_source, page_indexes, owners, decode=True):
+    """
+    Yield the page records of the given (0-based) pages of a PDF.
+    An image shown on several pages only comes with the first of them (owners, see
+    pdf_image_owners), which holds no matter which pages are parsed.
+    With decode unset, images are left encoded (see pdf_page_images).
+    """
+    import pdfplumber
+
+    with pdfplumber.open(open_source(pdf_source)) as pdf, open_pdf_document(pdf_source) as doc:
+        for page_index in page_indexes:
+            page = pdf.pages[page_index]
+            page_num = page_index + 1
+            yield {
+                "page": page_num,
+                "text": pdf_page_text(page, page_num),
+                "tables": pdf_page_tables(page, page_num),
+                "images": list(pdf_page_images(doc, page_index, set(), owners, decode)),
+            }
+            # Release pdfplumber's cached layout objects for this page
+            page.flush_cache()
+
+
+def _parse_pdf_shard(pdf_source, page_indexes, owners):
+    """
+    Process pool entry point: parse a set of pages and return their records, with
+    images still encoded so they cross the process boundary compressed.
+    """
+    return list(_iter_pdf_pages(pdf_source, page_indexes, owners, decode=False))
+
+
+def parse_pdf(pdf_source, workers=None, pages=None):
+    """
+    Walk a PDF once and yield one record per page with its text, tables and images.
+    pdfplumber handles text and tables, fitz the embedded images, both opened a single time.
+    When pages (1-based page numbers) is given, only those pages are parsed.
+    pdf_source is a path, bytes, a file object or a SpooledUpload.
+
+    With more than one worker (defaults to PDF_WORKERS), page ranges are parsed in a
+    shared process pool. Workers open the file by path (in-memory sources are written
+    to a temp file once), at most two shards per worker are in flight so parsed pages
+    never pile up ahead of the consumer, and images are decoded here as each page is
+    yielded, in page order.
+    """
+    with open_pdf_document(pdf_source) as doc:
+        page_count = doc.page_count
+        owners = pdf_image_owners(doc)
+    page_indexes = [i for i in range(page_count) if pages is None or i + 1 in pages]
+
+    workers = PDF_WORKERS if workers is None else workers
+    shard_size = max(1, min(PDF_PAGES_PER_SHARD, -(-len(page_indexes) // max(1, workers))))
+    if workers <= 1 or len(page_indexes) <= shard_size:
+        yield from _iter_pdf_pages(pdf_source, page_indexes, owners)
+        return
+
+    shards = iter([page_indexes[start:start + shard_size]
+                   for start in range(0, len(page_indexes), shard_size)])
+    pool = _get_pdf_pool(workers)
+    in_flight = deque()
+    with source_on_disk(pdf_source, ".pdf") as path:
+        try:
+            for shard in shards:
+                in_flight.append(pool.submit(_parse_pdf_shard, path, shard, owners))
+                if len(in_flight) < 2 * workers:
+                    continue
+                yield from _decoded_records(in_flight.popleft().result())
+            while in_flight:
+                yield from _decoded_records(in_flight.popleft().result())
+        finally:
+            # The consumer stopped early: drop the shards that haven't started
+            for future in in_flight:
+                future.cancel()
+
+
+def _decoded_records(records):
+    """Yield page records parsed by a worker, decoding their images one page at a time."""
+    for record in records:
+        for entry in record["images"]:
+            entry["image"] = decode_image(entry.pop("image_bytes"))
+        yield record
+
+
+def parse_docx(docx_source, pages=None):
+    """
+    Load a DOCX once and yield a single record for the whole document,
+    since Word files carry no page structure (pages is accepted and ignored).
+    """
+    from docx import Document
+
+    doc = Document(open_source(docx_source))
+    text_blocks = docx_text(doc)
+    yield {
+        "page": None,
+        "text": "\n".join(text_blocks) if text_blocks else None,
+        "tables": docx_tables(doc),
+        "images": list(docx_images(doc, set())),
+    }
+
+
+def parse_pptx(pptx_source, pages=None):
+    """
+    Load a presentation once and yield one record per slide (or per slide listed in pages).
+    An image shown on several slides only comes with the first of them.
+    """
+    from pptx import Presentation
+
+    prs = Presentation(open_source(pptx_source))
+    owners = pptx_image_owners(prs)
+    for slide_idx, slide in enumerate(prs.slides):
+        slide_num = slide_idx + 1
+        if pages is not None and slide_num not in pages:
+            continue
+        yield {
+            "page": slide_num,
+            "text": pptx_slide_text(slide, slide_num),
+            "tables": pptx_slide_tables(slide, slide_num),
+            "images": list(pptx_slide_images(slide, slide_num, set(), owners)),
+        }
+
+
+def _source_format(source, file_type=None):
+    """Extension of a document source (e.g. '.pdf'), from file_type or its name."""
+    if file_type:
+        return "." + file_type.lower().lstrip(".")
+    return os.path.splitext(source_name(source))[-1].lower()
+
+
+def parse_document_by_format(source, pages=None, file_type=None):
+    """
+    Parse a document in a single pass based on its format.
+    source is a path, a SpooledUpload, bytes or a file object; file_type ('pdf',
+    'docx' or 'pptx') is needed when the format can't be told from its name.
+    Yields dicts with 'page', 'text', 'tables' and 'images' keys.
+    When pages (a set of 1-based page/slide numbers) is given, only those are parsed.
+    """
+    ext = _source_format(source, file_type)
+    if ext == ".pdf":
+        return parse_pdf(source, pages=pages)
+    elif ext == ".docx":
+        return parse_docx(source, pages=pages)
+    elif ext == ".pptx":
+        return parse_pptx(source, pages=pages)
+    else:
+        raise ValueError(f"Unsupported file type for document parsing: {ext}")
+
+
+# Indirect references ("12 0 R") in the source of a PDF object
+_PDF_REFERENCE = re.compile(r"(\d+) \d+ R")
+# Links back up the page tree, which would tie every page to every other one
+_PDF_BACK_REFERENCE = re.compile(r"/(?:Parent|P)\s*\d+ \d+ R")
+
+
+def _pdf_object_digest(doc, xref):
+    """Digest of a PDF object's own source and raw stream, and the objects it references"""
+    source = _PDF_BACK_REFERENCE.sub("", doc.xref_object(xref, compressed=True))
+    digest = hashlib.sha256(source.encode())
+    if doc.xref_is_stream(xref):
+        digest.update(doc.xref_stream_raw(xref) or b"")
+    return digest.digest(), [int(ref) for ref in _PDF_REFERENCE.findall(source)]
+
+
+def _pdf_page_resources(doc, page):
+    """Source of the page's resource dictionary, inherited from the page tree when the page has none"""
+    xref = page.xref
+    while xref:
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            return value
+        kind, value = doc.xref_get_key(xref, "Parent")
+        xref = int(value.split()[0]) if kind == "xref" else 0
+    return ""
+
+
+def _owned_images(owners):
+    """Invert {image key: page} into {page: sorted image keys}"""
+    owned = {}
+    for key, page in owners.items():
+        owned.setdefault(page, []).append(key)
+    return {page: sorted(keys) for page, keys in owned.items()}
+
+
+def pdf_page_fingerprints(pdf_source):
+    """
+    Fingerprint every PDF page from its raw content streams and everything its
+    resources reference: form XObjects (nested ones included), fonts and image
+    streams. Text drawn inside a form XObject changes the page's fingerprint
+    just like text in the page itself. No layout analysis or image decoding is done.
+    The images a page is the first to show are part of its fingerprint too, so a
+    page takes over a repeated image once the page that showed it first drops it.
+    """
+    fingerprints = {}
+    # {xref: (digest, referenced xrefs)}, shared by the pages using the same fonts and forms
+    memo = {}
+    with open_pdf_document(pdf_source) as doc:
+        owned = _owned_images(pdf_image_owners(doc))
+        for page_index in range(doc.page_count):
+            page = doc[page_index]
+            digest = hashlib.sha256(page.read_contents())
+            digest.update(repr(tuple(page.rect)).encode())
+            resources = _PDF_BACK_REFERENCE.sub("", _pdf_page_resources(doc, page))
+            digest.update(resources.encode())
+            stack = [int(ref) for ref in _PDF_REFERENCE.findall(resources)][::-1]
+            visited = set()
+            while stack:
+                xref = stack.pop()
+                if xref in visited:
+                    continue
+                visited.add(xref)
+                if xref not in memo:
+                    memo[xref] = _pdf_object_digest(doc, xref)
+                object_digest, references = memo[xref]
+                digest.update(object_digest)
+                stack.extend(reversed(references))
+            digest.update(" ".join(owned.get(page_index + 1, [])).encode())
+            fingerprints[page_index + 1] = digest.hexdigest()
+    return fingerprints
+
+
+def pptx_slide_fingerprints(pptx_source):
+    """
+    Fingerprint every slide from its XML, the bytes of the parts it references
+    and the images it is the first to show (see pdf_page_fingerprints).
+    """
+    from pptx import Presentation
+
+    prs = Presentation(open_source(pptx_source))
+    owned = _owned_images(pptx_image_owners(prs))
+    fingerprints = {}
+    for slide_idx, slide in enumerate(prs.slides):
+        digest = hashlib.sha256(slide.part.blob)
+        for rel in sorted(slide.part.rels.values(), key=lambda rel: rel.rId):
+            if not rel.is_external and "slideLayout" not in rel.reltype:
+                digest.update(rel.target_part.blob)
+        digest.update(" ".join(owned.get(slide_idx + 1, [])).encode())
+        fingerprints[slide_idx + 1] = digest.hexdigest()
+    return fingerprints
+
+
+def page_fingerprints(source, file_type=None):
+    """
+    Return {page number: fingerprint} for formats with pages (PDF and PPTX),
+    or None for formats that are always processed as a whole.
+    """
+    ext = _source_format(source, file_type)
+    if ext == ".pdf":
+        return pdf_page_fingerprints(source)
+    elif ext == ".pptx":
+        return pptx_slide_fingerprints(source)
+    return None
@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SQLite file recording which document contents have been ingested
+DOCUMENT_REGISTRY_PATH = os.getenv(
+    "DOCUMENT_REGISTRY_PATH", os.path.join(PROJECT_ROOT, "data", "registry", "documents.sqlite")
+)
+
+
+class DocumentRegistry:
+    """
+    Records every ingested document: its ID, source name, the document key it was
+    uploaded under (if any), content hash, the pipeline version that processed it
+    and the IDs of the chunks it produced, plus, for paged formats, each page's
+    fingerprint and chunk IDs.
+    Entries belong to the collection and embedder the document was stored with, so
+    switching either starts from an empty record instead of skipping every file.
+    Used to skip files that were already ingested and to replace the chunks of
+    documents (or just the pages) whose content changed.
+    Also holds a version counter per collection, bumped whenever ingestion changes
+    the collection, so every process on the host can tell its cached searches are stale.
+    """
+
+    def __init__(self, path: str = DOCUMENT_REGISTRY_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(documents)")]
+        if columns and "collection" not in columns:
+            # Entries from before they were tied to a collection can't be trusted for
+            # any of them; their files are simply ingested again
+            conn.execute("DROP TABLE documents")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "collection TEXT NOT NULL, embedder TEXT NOT NULL, doc_id TEXT NOT NULL, "
+            "source TEXT NOT NULL, document_key TEXT, content_hash TEXT NOT NULL, "
+            "pipeline_version TEXT NOT NULL, chunk_ids TEXT NOT NULL, pages TEXT, updated REAL NOT NULL, "
+            "PRIMARY KEY (collection, embedder, doc_id))"
+        )
+        conn.execute("DROP INDEX IF EXISTS documents_content_hash")
+        conn.execute("DROP INDEX IF EXISTS documents_source")
+        conn.execute("DROP INDEX IF EXISTS documents_document_key")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_by_hash ON documents(collection, embedder, content_hash)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS documents_by_source ON documents(collection, source)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS documents_by_key ON documents(collection, embedder, document_key)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS collection_versions ("
+            "collection TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread, since sqlite3 connections are not shareable."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _entry(row):
+        entry = dict(row)
+        entry["chunk_ids"] = json.loads(entry["chunk_ids"])
+        # {page number (as a string): {"fingerprint": ..., "chunk_ids": [...]}}
+        entry["pages"] = json.loads(entry["pages"]) if entry.get("pages") else None
+        return entry
+
+    def _find(self, column: str, value: str, collection: str, embedder: str = None):
+        query = f"SELECT * FROM documents WHERE collection = ? AND {column} = ?"
+        params = [collection, value]
+        if embedder is not None:
+            query += " AND embedder = ?"
+            params.append(embedder)
+        row = self._connection().execute(query + " ORDER BY updated DESC LIMIT 1", params).fetchone()
+        return self._entry(row) if row is not None else None
+
+    def find_by_hash(self, content_hash: str, collection: str, embedder: str = None):
+        """Return the document entry ingested from this exact content, or None (any embedder unless given)."""
+        return self._find("content_hash", content_hash, collection, embedder)
+
+    def find_by_key(self, document_key: str, collection: str, embedder: str = None):
+        """Return the latest document entry ingested under this document key, or None (any embedder unless given)."""
+        return self._find("document_key", document_key, collection, embedder)
+
+    def find_by_id(self, doc_id: str, collection: str, embedder: str = None):
+        """Return the entry of a document of the collection, by any embedder unless one is given."""
+        return self._find("doc_id", doc_id, collection, embedder)
+
+    def record(self, doc_id: str, source: str, content_hash: str, pipeline_version: str,
+               chunk_ids: list, pages: dict = None, document_key: str = None, *,
+               collection: str, embedder: str) -> None:
+        """Create or replace the entry of a document after it was stored in collection by embedder."""
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO documents "
+            "(collection, embedder, doc_id, source, content_hash, pipeline_version, chunk_ids, pages, "
+            "document_key, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (collection, embedder, doc_id, source, content_hash, pipeline_version, json.dumps(chunk_ids),
+             json.dumps(pages) if pages is not None else None, document_key, time.time())
+        )
+        conn.commit()
+
+    def collection_version(self, collection: str) -> int:
+        """Current version of a collection's content (0 until its first change)."""
+        row = self._connection().execute(
+            "SELECT version FROM collection_versions WHERE collection = ?", (collection,)
+        ).fetchone()
+        return row["version"] if row is not None else 0
+
+    def bump_collection_version(self, collection: str) -> None:
+        """Record that the collection's content changed."""
+        conn = self._connection()
+        conn.execute(
+            "INSERT INTO collection_versions (collection, version) VALUES (?, 1) "
+            "ON CONFLICT(collection) DO UPDATE SET version = version + 1",
+            (collection,)
+        )
+        conn.commit()
+
+    def remove(self, doc_id: str, collection: str) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM documents WHERE collection = ? AND doc_id = ?", (collection, doc_id))
+        conn.commit()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_document_registry() -> DocumentRegistry:
+    """Return the registry shared by the process, opening it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DocumentRegistry()
+        return _registry
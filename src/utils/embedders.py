@@ -0,0 +1,96 @@
+import os
+import threading
+from langchain_core.embeddings import Embeddings
+from .model_registry import model_registry
+
+# Embedding backend: "nvidia" (NVIDIA AI endpoints) or "local" (sentence-transformers on CPU)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "nvidia").strip().lower()
+NVIDIA_EMBEDDING_MODEL = "nv-embed-v1"
+# sentence-transformers model used by the local backend
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# Texts encoded together by the local model
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+# Torch threads used by the local model (0 keeps torch's default, one per core)
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "0"))
+# "int8" quantizes the model's linear layers, "onnx" runs it with ONNX Runtime; empty runs it as is
+LOCAL_EMBEDDING_QUANTIZE = os.getenv("LOCAL_EMBEDDING_QUANTIZE", "").strip().lower()
+# ONNX file of the model repository to run, e.g. onnx/model_qint8_avx512_vnni.onnx (empty uses onnx/model.onnx)
+LOCAL_EMBEDDING_ONNX_FILE = os.getenv("LOCAL_EMBEDDING_ONNX_FILE", "")
+
+
+def _load_sentence_transformer():
+    """Load the local embedding model; called by the model registry on first use."""
+    from sentence_transformers import SentenceTransformer
+
+    if LOCAL_EMBEDDING_THREADS > 0:
+        import torch
+        torch.set_num_threads(LOCAL_EMBEDDING_THREADS)
+
+    if LOCAL_EMBEDDING_QUANTIZE == "onnx":
+        model_kwargs = {"file_name": LOCAL_EMBEDDING_ONNX_FILE} if LOCAL_EMBEDDING_ONNX_FILE else None
+        return SentenceTransformer(LOCAL_EMBEDDING_MODEL, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    model = SentenceTransformer(LOCAL_EMBEDDING_MODEL, device="cpu")
+    model.eval()
+    if LOCAL_EMBEDDING_QUANTIZE == "int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+if EMBEDDING_BACKEND == "local":
+    model_registry.register("embedder", _load_sentence_transformer)
+
+
+class SentenceTransformerEmbeddings(Embeddings):
+    """
+    Embeds texts on the CPU with the local sentence-transformers model, in batches
+    of batch_size. Vectors are normalized, so cosine and dot product agree.
+    Encoding is serialized: the model already spreads each batch over the torch
+    threads, and concurrent batches would only compete for them.
+    """
+
+    def __init__(self, batch_size: int = None):
+        self.batch_size = max(1, batch_size or LOCAL_EMBEDDING_BATCH_SIZE)
+        self._lock = threading.Lock()
+
+    def _encode(self, texts: list) -> list:
+        with self._lock, model_registry.use("embedder") as model:
+            vectors = model.encode(
+                texts,
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        return vectors.tolist()
+
+    def embed_documents(self, texts: list) -> list:
+        return self._encode(list(texts)) if texts else []
+
+    def embed_query(self, text: str) -> list:
+        return self._encode([text])[0]
+
+
+def embedder_id() -> str:
+    """
+    Name of the configured embedder, recorded with every stored chunk: vectors
+    from different embedders live in different spaces and must not be mixed.
+    """
+    if EMBEDDING_BACKEND == "local":
+        suffix = f"+{LOCAL_EMBEDDING_QUANTIZE}" if LOCAL_EMBEDDING_QUANTIZE else ""
+        return f"local:{LOCAL_EMBEDDING_MODEL}{suffix}"
+    return f"nvidia:{NVIDIA_EMBEDDING_MODEL}"
+
+
+def create_embedder() -> Embeddings:
+    """Create the embeddings client of the configured EMBEDDING_BACKEND."""
+    if EMBEDDING_BACKEND == "local":
+        return SentenceTransformerEmbeddings()
+    if EMBEDDING_BACKEND != "nvidia":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND} (expected 'nvidia' or 'local')")
+
+    from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
+    return NVIDIAEmbeddings(
+        model_name=NVIDIA_EMBEDDING_MODEL,
+        nvidia_api_key=os.getenv("NVIDIA_API_KEY")
+    )
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+from array import array
+from langchain_core.embeddings import Embeddings
+from .disk_cache import DiskCache
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SQLite file holding float32 embeddings keyed by model and text; empty disables the cache
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(PROJECT_ROOT, "data", "cache", "embeddings.sqlite"))
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None and EMBEDDING_CACHE_PATH:
+            _cache = DiskCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES)
+        return _cache
+
+
+def _pack(vector) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(value: bytes) -> list:
+    vector = array("f")
+    vector.frombytes(value)
+    return vector.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with the shared embedding cache.
+
+    Vectors are stored as float32 under a hash of the model name, the input type
+    (models like NV-Embed embed queries and passages differently) and the text, so
+    identical chunks and repeated queries are only embedded once per host.
+    Cache errors fall back to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str):
+        self.embeddings = embeddings
+        self.model_name = model_name
+
+    def _key(self, input_type: str, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{input_type}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: list) -> dict:
+        cache = _get_cache()
+        if cache is None:
+            return {}
+        try:
+            return cache.get_many(list(set(keys)))
+        except Exception as e:
+            print(f"Embedding cache lookup error: {e}")
+            return {}
+
+    def _store(self, items: dict) -> None:
+        cache = _get_cache()
+        if cache is None or not items:
+            return
+        try:
+            cache.set_many(items)
+        except Exception as e:
+            print(f"Embedding cache write error: {e}")
+
+    def embed_documents(self, texts: list) -> list:
+        keys = [self._key("passage", text) for text in texts]
+        found = self._lookup(keys)
+        vectors = [_unpack(found[key]) if key in found else None for key in keys]
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing = {}
+        for i, key in enumerate(keys):
+            if vectors[i] is None:
+                missing.setdefault(key, texts[i])
+        if missing:
+            packed = {
+                key: _pack(vector)
+                for key, vector in zip(missing, self.embeddings.embed_documents(list(missing.values())))
+            }
+            self._store(packed)
+            # Hand out the stored float32 values, so hits and misses return the same vectors
+            embedded = {key: _unpack(value) for key, value in packed.items()}
+            vectors = [vector if vector is not None else embedded[key] for key, vector in zip(keys, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        key = self._key("query", text)
+        found = self._lookup([key])
+        if key in found:
+            return _unpack(found[key])
+        packed = _pack(self.embeddings.embed_query(text))
+        self._store({key: packed})
+        return _unpack(packed)
+
+
+def embedding_cache_stats() -> dict:
+    cache = _get_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
@@ -1,9 +1,10 @@
 import os
 from werkzeug.utils import secure_filename
-from io import BytesIO
 
-from src.utils.image_processor import process_image_and_save
-from src.utils.text_extractor import extract_text_by_format
+from src.utils.image_processor import describe_image
+from src.utils.image_extractor import decode_image
+from src.utils.document_parser import parse_document_by_format
+from src.utils.spooled_upload import SpooledUpload
 
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'pptx', 'png', 'jpg', 'jpeg'}
 
@@ -20,12 +21,30 @@ def save_uploaded_files(files, upload_folder):
             saved_files.append(filepath)
     return saved_files
 
+def spool_uploaded_files(files):
+    """
+    Wrap the allowed uploads as SpooledUploads so they are processed where the
+    request parser left them (in memory, or in a temp file for large requests)
+    instead of being saved under the upload folder first.
+    """
+    uploads = []
+    for file in files:
+        if file and allowed_file(file.filename):
+            uploads.append(SpooledUpload(secure_filename(file.filename), file.stream))
+    return uploads
+
 def process_file_content(file_content, file_type):
-    """Process file content directly from memory"""
-    content = BytesIO(file_content)
+    """Process file content (bytes or a file object) directly from memory and return its text"""
     if file_type in ['pdf', 'docx', 'pptx']:
-        return extract_text_by_format(content, file_type, in_memory=True)
+        blocks = []
+        for record in parse_document_by_format(file_content, file_type=file_type):
+            if record["text"]:
+                blocks.append(record["text"])
+            blocks.extend(record["tables"])
+        return "\n".join(blocks)
     elif file_type in ['png', 'jpg', 'jpeg']:
-        return process_image_and_save(content, in_memory=True)
+        image_bytes = file_content if isinstance(file_content, bytes) else file_content.read()
+        with decode_image(image_bytes) as image:
+            return describe_image(image, "[Uploaded Image]")
     else:
-        raise ValueError(f"Unsupported file type: {file_type}")
\ No newline at end of file
+        raise ValueError(f"Unsupported file type: {file_type}")
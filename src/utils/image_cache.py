@@ -0,0 +1,69 @@
+import json
+import os
+from .disk_cache import DiskCache
+from .ocr import get_ocr_version
+from .image_captioning import CAPTION_MODEL_NAME
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# SQLite file holding OCR/caption results keyed by image hash; empty disables the cache
+IMAGE_CACHE_PATH = os.getenv("IMAGE_CACHE_PATH", os.path.join(PROJECT_ROOT, "data", "cache", "image_analysis.sqlite"))
+IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("IMAGE_CACHE_MAX_ENTRIES", "200000"))
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    if _cache is None and IMAGE_CACHE_PATH:
+        _cache = DiskCache(IMAGE_CACHE_PATH, IMAGE_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def _cache_key(image_hash: str) -> str:
+    # Imported here: image_extractor depends on this module through image_processor
+    from .image_extractor import MAX_IMAGE_SIDE
+    # Results depend on the resolution images were analysed at. Entries from before
+    # failed OCR was told apart from empty text ("v2") may hold failures, so they are not reused
+    return f"{image_hash}|{get_ocr_version()}|{CAPTION_MODEL_NAME}|{MAX_IMAGE_SIDE}|v2"
+
+
+def get_cached_analyses(image_hashes: list) -> dict:
+    """
+    Look up earlier OCR/caption results for the given image hashes.
+    Returns {image_hash: (ocr_text, caption)} for the hashes found.
+    """
+    cache = _get_cache()
+    hashes = [h for h in image_hashes if h]
+    if cache is None or not hashes:
+        return {}
+    try:
+        keys = {_cache_key(h): h for h in hashes}
+        found = cache.get_many(list(keys))
+    except Exception as e:
+        print(f"Image cache lookup error: {e}")
+        return {}
+    results = {}
+    for key, value in found.items():
+        data = json.loads(value)
+        results[keys[key]] = (data["ocr"], data["caption"])
+    return results
+
+
+def store_analyses(analyses: dict) -> None:
+    """Store {image_hash: (ocr_text, caption)} results for later runs."""
+    cache = _get_cache()
+    if cache is None or not analyses:
+        return
+    try:
+        cache.set_many({
+            _cache_key(h): json.dumps({"ocr": ocr_text, "caption": caption}).encode("utf-8")
+            for h, (ocr_text, caption) in analyses.items() if h
+        })
+    except Exception as e:
+        print(f"Image cache write error: {e}")
+
+
+def image_cache_stats() -> dict:
+    cache = _get_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
@@ -1,21 +1,54 @@
 # File: app/utils/image_captioning.py
+import os
+from typing import List
 from PIL import Image
-from transformers import BlipProcessor, BlipForConditionalGeneration
-import torch
+from .model_registry import model_registry
 
-blip_processor = BlipProcessor.from_pretrained("Salesforce/blip-image-captioning-base")
-blip_model = BlipForConditionalGeneration.from_pretrained("Salesforce/blip-image-captioning-base")
+# Number of images captioned together in one generate call
+CAPTION_BATCH_SIZE = int(os.getenv("CAPTION_BATCH_SIZE", "8"))
+CAPTION_MODEL_NAME = "Salesforce/blip-image-captioning-base"
 
-def generate_caption(image: Image.Image) -> str:
+def _load_blip():
+    """Load the BLIP processor and model; called by the model registry on first use."""
+    from transformers import BlipProcessor, BlipForConditionalGeneration
+    blip_processor = BlipProcessor.from_pretrained(CAPTION_MODEL_NAME)
+    blip_model = BlipForConditionalGeneration.from_pretrained(CAPTION_MODEL_NAME)
+    blip_model.eval()
+    return blip_processor, blip_model
+
+model_registry.register("blip", _load_blip)
+
+def generate_captions(images: List[Image.Image], batch_size: int = None) -> List[str]:
     """
-    Generate a semantic caption for an image using BLIP model.
+    Generate semantic captions for several images using BLIP model.
+    The processor resizes every image to the model input size, so each batch is
+    stacked into a single tensor and captioned by one generate call.
+    Captions are returned in input order; the images of a failed batch get None.
     """
+    batch_size = batch_size or CAPTION_BATCH_SIZE
+    captions = []
     try:
-        inputs = blip_processor(image, return_tensors="pt")
-        with torch.no_grad():
-            output = blip_model.generate(**inputs)
-        caption = blip_processor.decode(output[0], skip_special_tokens=True)
-        return caption
+        import torch
+
+        with model_registry.use("blip") as (blip_processor, blip_model):
+            for start in range(0, len(images), batch_size):
+                batch = images[start:start + batch_size]
+                try:
+                    inputs = blip_processor(images=batch, return_tensors="pt")
+                    with torch.no_grad():
+                        output = blip_model.generate(**inputs)
+                    captions.extend(blip_processor.batch_decode(output, skip_special_tokens=True))
+                except Exception as e:
+                    print(f"Image captioning error: {e}")
+                    captions.extend([None] * len(batch))
     except Exception as e:
+        # torch or the model itself could not be loaded
         print(f"Image captioning error: {e}")
-        return ""
+        return [None] * len(images)
+    return captions
+
+def generate_caption(image: Image.Image) -> str:
+    """
+    Generate a semantic caption for an image using BLIP model ("" when captioning failed).
+    """
+    return generate_captions([image])[0] or ""
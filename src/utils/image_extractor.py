@@ -1,121 +1,193 @@
 import os
 from PIL import Image
-import fitz  # PyMuPDF
 from io import BytesIO
 import hashlib
-from .image_processor import process_image_and_save
+from .image_processor import process_images_and_save
+from .spooled_upload import open_pdf_document, open_source, source_name
 
-def extract_images_from_pdf(pdf_path, output_folder):
-    os.makedirs(output_folder, exist_ok=True)
-    output_file = os.path.join(output_folder, "image_analysis.txt")
-    doc = fitz.open(pdf_path)
-    seen_hashes = set()
-    count = 0
+# Longest side, in pixels, images are decoded to (0 keeps full resolution); downscaling
+# saves memory on large scans but can cost OCR accuracy on small print
+MAX_IMAGE_SIDE = int(os.getenv("MAX_IMAGE_SIDE", "0"))
 
-    for page_index in range(len(doc)):
-        for img_index, img in enumerate(doc.get_page_images(page_index)):
+def decode_image(image_bytes, max_side=MAX_IMAGE_SIDE):
+    """
+    Decode image bytes to an RGB PIL image, downscaled so neither side exceeds max_side.
+    JPEGs are scaled during decoding, so large scans are never fully materialised.
+    """
+    pil_img = Image.open(BytesIO(image_bytes))
+    if max_side and max(pil_img.size) > max_side:
+        pil_img.draft("RGB", (max_side, max_side))
+    pil_img = pil_img.convert("RGB")
+    if max_side and max(pil_img.size) > max_side:
+        pil_img.thumbnail((max_side, max_side))
+    return pil_img
+
+def _unique_image(image_bytes, seen_hashes):
+    """Return the sha256 of the image bytes, or None if it was already seen."""
+    hash_val = hashlib.sha256(image_bytes).hexdigest()
+    if hash_val in seen_hashes:
+        return None
+    seen_hashes.add(hash_val)
+    return hash_val
+
+def pdf_image_key(doc, xref):
+    """Identity of a PDF image, from its raw stream, without extracting or decoding it"""
+    return hashlib.sha256(doc.xref_stream_raw(xref) or b"").hexdigest()
+
+def pdf_image_owners(doc):
+    """
+    Return {image key: number of the first page showing it} for a fitz document,
+    so an image repeated across pages (a logo, a slide template) belongs to one page.
+    """
+    owners = {}
+    keys = {}
+    for page_index in range(doc.page_count):
+        for img in doc.get_page_images(page_index):
             xref = img[0]
-            base_image = doc.extract_image(xref)
-            image_bytes = base_image["image"]
+            if xref not in keys:
+                keys[xref] = pdf_image_key(doc, xref)
+            owners.setdefault(keys[xref], page_index + 1)
+    return owners
 
-            # Check image dimensions using PIL
-            img_stream = BytesIO(image_bytes)
-            pil_img = Image.open(img_stream).convert("RGB")
-            width, height = pil_img.size
+def pdf_page_images(doc, page_index, seen_hashes, owners=None, decode=True):
+    """
+    Yield the unique images of a single fitz page as dicts with
+    'source_info', 'image' (RGB PIL image) and 'hash' keys.
+    Size and duplicate checks use the PDF image metadata and raw bytes,
+    so only the images that are kept get decoded.
+    When owners (see pdf_image_owners) is given, images first shown on another
+    page are left to that page. With decode unset, entries carry the encoded
+    'image_bytes' instead of 'image', for the caller to decode_image later.
+    """
+    for img_index, img in enumerate(doc.get_page_images(page_index)):
+        xref, width, height = img[0], img[2], img[3]
+
+        # Skip tiny images
+        if width <= 2 or height <= 2:
+            continue
+
+        if owners is not None and owners.get(pdf_image_key(doc, xref), page_index + 1) != page_index + 1:
+            continue
+
+        image_bytes = doc.extract_image(xref)["image"]
+        hash_val = _unique_image(image_bytes, seen_hashes)
+        if hash_val is None:
+            continue
+
+        entry = {"source_info": f"[PDF Page {page_index+1}, Image {img_index+1}]", "hash": hash_val}
+        if decode:
+            entry["image"] = decode_image(image_bytes)
+        else:
+            entry["image_bytes"] = image_bytes
+        yield entry
+
+def pptx_image_owners(prs):
+    """Return {image hash: number of the first slide showing it}, see pdf_image_owners."""
+    owners = {}
+    for slide_idx, slide in enumerate(prs.slides):
+        for shape in slide.shapes:
+            if shape.shape_type == 13:  # PICTURE
+                owners.setdefault(hashlib.sha256(shape.image.blob).hexdigest(), slide_idx + 1)
+    return owners
 
-            # Skip tiny images
+def pptx_slide_images(slide, slide_num, seen_hashes, owners=None):
+    """Yield the unique images of a single python-pptx slide, see pdf_page_images."""
+    for shape_idx, shape in enumerate(slide.shapes):
+        if shape.shape_type == 13:  # PICTURE
+            image_bytes = shape.image.blob
+
+            # Opening without loading only parses the image header
+            width, height = Image.open(BytesIO(image_bytes)).size
             if width <= 2 or height <= 2:
                 continue
 
-            hash_val = hashlib.sha256(image_bytes).hexdigest()
-            if hash_val in seen_hashes:
+            if owners is not None and owners.get(hashlib.sha256(image_bytes).hexdigest(), slide_num) != slide_num:
+                continue
+
+            hash_val = _unique_image(image_bytes, seen_hashes)
+            if hash_val is None:
+                continue
+
+            yield {
+                "source_info": f"[PPTX Slide {slide_num}, Image {shape_idx+1}]",
+                "image": decode_image(image_bytes),
+                "hash": hash_val,
+            }
+
+def docx_images(doc, seen_hashes):
+    """Yield the unique images embedded in a python-docx Document, see pdf_page_images."""
+    img_idx = 0
+    for rel in doc.part.rels.values():
+        if "image" not in rel.reltype or rel.is_external:
+            continue
+        image_bytes = rel.target_part.blob
+        img_idx += 1
+        try:
+            width, height = Image.open(BytesIO(image_bytes)).size
+            if width <= 2 or height <= 2:
                 continue
-            seen_hashes.add(hash_val)
 
-            # Process image
-            source_info = f"[PDF Page {page_index+1}, Image {img_index+1}]"
-            process_image_and_save(pil_img, output_file, source_info)
-            count += 1
+            hash_val = _unique_image(image_bytes, seen_hashes)
+            if hash_val is None:
+                continue
 
-    print(f"[PDF] Processed {count} images from '{os.path.basename(pdf_path)}'")
+            pil_img = decode_image(image_bytes)
+        except Exception as e:
+            print(f"Error processing DOCX image {img_idx}: {e}")
+            continue
 
-def extract_images_from_pptx(pptx_path, output_folder):
-    import os
-    from pptx import Presentation
-    from PIL import Image
-    from io import BytesIO
-    import hashlib
-    from .image_processor import process_image_and_save
+        yield {
+            "source_info": f"[DOCX Image {img_idx}]",
+            "image": pil_img,
+            "hash": hash_val,
+        }
 
+def extract_images_from_pdf(pdf_path, output_folder):
     os.makedirs(output_folder, exist_ok=True)
     output_file = os.path.join(output_folder, "image_analysis.txt")
-    prs = Presentation(pptx_path)
+    doc = open_pdf_document(pdf_path)
     seen_hashes = set()
-    count = 0
+    entries = []
 
-    for slide_idx, slide in enumerate(prs.slides):
-        for shape_idx, shape in enumerate(slide.shapes):
-            if shape.shape_type == 13:  # PICTURE
-                image = shape.image
-                image_bytes = image.blob
+    for page_index in range(len(doc)):
+        entries.extend(pdf_page_images(doc, page_index, seen_hashes))
 
-                img_stream = BytesIO(image_bytes)
-                pil_img = Image.open(img_stream).convert("RGB")
-                width, height = pil_img.size
+    # Caption the whole document's images in batches
+    process_images_and_save(entries, output_file)
+    print(f"[PDF] Processed {len(entries)} images from '{source_name(pdf_path)}'")
 
-                if width <= 2 or height <= 2:
-                    continue
+def extract_images_from_pptx(pptx_path, output_folder):
+    from pptx import Presentation
 
-                hash_val = hashlib.sha256(image_bytes).hexdigest()
-                if hash_val in seen_hashes:
-                    continue
-                seen_hashes.add(hash_val)
+    os.makedirs(output_folder, exist_ok=True)
+    output_file = os.path.join(output_folder, "image_analysis.txt")
+    prs = Presentation(open_source(pptx_path))
+    seen_hashes = set()
+    entries = []
 
-                # Process image
-                source_info = f"[PPTX Slide {slide_idx+1}, Image {shape_idx+1}]"
-                process_image_and_save(pil_img, output_file, source_info)
-                count += 1
+    for slide_idx, slide in enumerate(prs.slides):
+        entries.extend(pptx_slide_images(slide, slide_idx+1, seen_hashes))
 
-    print(f"[PPTX] Processed {count} images from '{os.path.basename(pptx_path)}'")
+    # Caption the whole deck's images in batches
+    process_images_and_save(entries, output_file)
+    print(f"[PPTX] Processed {len(entries)} images from '{source_name(pptx_path)}'")
 
 def extract_images_from_docx(docx_path, output_folder):
-    import os
-    import docx2txt
-    from PIL import Image
-    from .image_processor import process_image_and_save
-    
+    from docx import Document
+
     os.makedirs(output_folder, exist_ok=True)
-    temp_img_dir = os.path.join(output_folder, "temp_images")
-    os.makedirs(temp_img_dir, exist_ok=True)
-    
-    # Extract images to temporary directory
-    docx2txt.process(docx_path, temp_img_dir)
-    
     output_file = os.path.join(output_folder, "image_analysis.txt")
-    count = 0
-    
-    # Process each extracted image
-    for img_idx, filename in enumerate(os.listdir(temp_img_dir)):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif')):
-            img_path = os.path.join(temp_img_dir, filename)
-            try:
-                with Image.open(img_path).convert("RGB") as img:
-                    source_info = f"[DOCX Image {img_idx+1}]"
-                    process_image_and_save(img, output_file, source_info)
-                count += 1
-            except Exception as e:
-                print(f"Error processing {filename}: {e}")
-            finally:
-                os.remove(img_path)  # Clean up temporary image
-                
-    os.rmdir(temp_img_dir)  # Remove temporary directory
-    print(f"[DOCX] Processed {count} images from '{os.path.basename(docx_path)}'")
+    doc = Document(open_source(docx_path))
+    entries = list(docx_images(doc, set()))
+
+    process_images_and_save(entries, output_file)
+    print(f"[DOCX] Processed {len(entries)} images from '{source_name(docx_path)}'")
 
 def extract_images_by_format(path, output_folder):
     """
     Extract images based on file format
     """
-    ext = os.path.splitext(path)[-1].lower()
+    ext = os.path.splitext(source_name(path))[-1].lower()
     if ext == ".pdf":
         return extract_images_from_pdf(path, output_folder)
     elif ext == ".docx":
@@ -1,52 +1,144 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from PIL import Image
 from .ocr import extract_text_from_image
-from .image_captioning import generate_caption
+from .image_captioning import generate_captions, CAPTION_BATCH_SIZE
+from .image_cache import get_cached_analyses, store_analyses
+
+# Process-wide cap on image batches being OCR'd/captioned at once, shared by concurrent ingestions
+IMAGE_ANALYSIS_CONCURRENCY = int(os.getenv("IMAGE_ANALYSIS_CONCURRENCY", "2"))
+_analysis_slots = threading.BoundedSemaphore(max(1, IMAGE_ANALYSIS_CONCURRENCY))
+
+# Threads running tesseract subprocesses while the captioning model works on the same images
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "4"))
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _get_ocr_pool() -> ThreadPoolExecutor:
+    """Return the OCR thread pool shared by all image analyses, creating it on first use."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            _ocr_pool = ThreadPoolExecutor(max_workers=max(1, OCR_WORKERS), thread_name_prefix="ocr")
+        return _ocr_pool
 
 
 def process_images(image_paths: List[str]) -> List[str]:
     """
     Process images and return extracted textual content using OCR and image captioning.
     Each image is processed by both OCR and BLIP model to maximize text coverage.
+    Images are loaded and captioned CAPTION_BATCH_SIZE at a time.
     """
     results = []
-    for image_path in image_paths:
-        try:
-            print(f"Processing image: {image_path}")
-            image = Image.open(image_path).convert("RGB")
-            
-            # OCR Text
-            ocr_text = extract_text_from_image(image)
-
-            # Semantic Caption
-            caption = generate_caption(image)
+    for start in range(0, len(image_paths), CAPTION_BATCH_SIZE):
+        images = []
+        for image_path in image_paths[start:start + CAPTION_BATCH_SIZE]:
+            try:
+                print(f"Processing image: {image_path}")
+                images.append(Image.open(image_path).convert("RGB"))
+            except Exception as e:
+                print(f"Error processing {image_path}: {e}")
 
+        for ocr_text, caption in analyze_images(images):
             # Combine both results
-            full_description = f"[OCR]: {ocr_text.strip()}\n[Caption]: {caption.strip()}"
+            full_description = f"[OCR]: {(ocr_text or '').strip()}\n[Caption]: {(caption or '').strip()}"
             results.append(full_description)
-        except Exception as e:
-            print(f"Error processing {image_path}: {e}")
     return results
 
 
+def analyze_images(images: List[Image.Image], hashes: List[str] = None) -> List[tuple]:
+    """
+    Run OCR on each image and caption them in batches.
+    OCR runs on the OCR thread pool while captioning runs on the calling thread,
+    so a batch takes about as long as the slower of the two.
+    Returns (ocr_text, caption) pairs in input order, with None for the OCR text or
+    caption of an image that could not be analysed.
+    When content hashes are given, results cached from earlier runs are reused
+    and new results are added to the cache.
+    At most IMAGE_ANALYSIS_CONCURRENCY batches are analysed at once across the process.
+    """
+    if not images:
+        return []
+    hashes = hashes or [None] * len(images)
+    cached = get_cached_analyses(hashes)
+    pending = [i for i, h in enumerate(hashes) if h not in cached]
+
+    analyses = {}
+    if pending:
+        with _analysis_slots:
+            # OCR Text, in the background
+            ocr_futures = [_get_ocr_pool().submit(extract_text_from_image, images[i]) for i in pending]
+
+            # Semantic Captions
+            captions = generate_captions([images[i] for i in pending])
+
+            # Join per image in source order
+            ocr_texts = [future.result() for future in ocr_futures]
+
+        analyses = dict(zip(pending, zip(ocr_texts, captions)))
+        # Only remember complete analyses, so failed OCR or captioning is retried next time
+        store_analyses({
+            hashes[i]: analysis for i, analysis in analyses.items()
+            if hashes[i] and analysis[0] is not None and analysis[1] is not None
+        })
+
+    return [cached[h] if h in cached else analyses[i] for i, h in enumerate(hashes)]
+
+
+def describe_images(entries: List[dict]) -> List[str]:
+    """
+    Analyse extracted image entries (dicts with 'image', 'source_info' and
+    optionally 'hash' keys) and return their tagged descriptions in input order.
+    Images whose OCR or captioning failed get None, so they can be retried.
+    """
+    analyses = analyze_images(
+        [entry["image"] for entry in entries],
+        [entry.get("hash") for entry in entries]
+    )
+    return [
+        f"{entry['source_info']}\n[OCR]: {ocr_text.strip()}\n[Caption]: {caption.strip()}"
+        if ocr_text is not None and caption is not None else None
+        for entry, (ocr_text, caption) in zip(entries, analyses)
+    ]
+
+
+def describe_image(image: Image.Image, source_info: str) -> str:
+    """
+    Run OCR and captioning on a single image and return the tagged description.
+    Raises RuntimeError when the image could not be analysed.
+    """
+    description = describe_images([{"image": image, "source_info": source_info}])[0]
+    if description is None:
+        raise RuntimeError(f"OCR or captioning failed for {source_info}")
+    return description
+
+
+def process_images_and_save(entries: List[dict], output_path: str) -> None:
+    """
+    Process extracted image entries in batches and append their results to file.
+    """
+    for start in range(0, len(entries), CAPTION_BATCH_SIZE):
+        batch = entries[start:start + CAPTION_BATCH_SIZE]
+        try:
+            descriptions = describe_images(batch)
+
+            # Append to file
+            with open(output_path, 'a', encoding='utf-8') as f:
+                for entry, full_description in zip(batch, descriptions):
+                    if full_description is None:
+                        print(f"Error processing image {entry['source_info']}: OCR or captioning failed")
+                        continue
+                    f.write(full_description + "\n\n" + "-"*50 + "\n")
+
+        except Exception as e:
+            print(f"Error processing images: {e}")
+
+
 def process_image_and_save(image: Image.Image, output_path: str, source_info: str) -> None:
     """
     Process a single image with OCR and captioning and save results to file.
     """
-    try:
-        # OCR Text
-        ocr_text = extract_text_from_image(image)
-
-        # Semantic Caption
-        caption = generate_caption(image)
-
-        # Combine results
-        full_description = f"{source_info}\n[OCR]: {ocr_text.strip()}\n[Caption]: {caption.strip()}\n"
-        
-        # Append to file
-        with open(output_path, 'a', encoding='utf-8') as f:
-            f.write(full_description + "\n" + "-"*50 + "\n")
-            
-    except Exception as e:
-        print(f"Error processing image: {e}")
+    process_images_and_save([{"image": image, "source_info": source_info}], output_path)
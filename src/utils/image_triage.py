@@ -0,0 +1,152 @@
+import os
+from PIL import Image, ImageChops, ImageStat
+
+# Skip images that are unlikely to carry content before OCR and captioning
+IMAGE_TRIAGE_ENABLED = os.getenv("IMAGE_TRIAGE_ENABLED", "true").lower() == "true"
+# Minimum width * height in pixels (icons, bullet glyphs)
+TRIAGE_MIN_AREA = int(os.getenv("TRIAGE_MIN_AREA", "4096"))
+# Minimum greyscale histogram entropy in bits (solid or near-solid fills)
+TRIAGE_MIN_ENTROPY = float(os.getenv("TRIAGE_MIN_ENTROPY", "1.0"))
+# Minimum mean per-channel standard deviation (flat backgrounds and gradients)
+TRIAGE_MIN_STDDEV = float(os.getenv("TRIAGE_MIN_STDDEV", "6.0"))
+# Images whose darkest and lightest pixels differ by this many grey levels are always kept,
+# however low their entropy and variance: a few lines of text on a blank page score low on both
+TRIAGE_MIN_CONTRAST = int(os.getenv("TRIAGE_MIN_CONTRAST", "64"))
+# Maximum perceptual hash distance, out of 64 bits, for two images to count as the same (-1 disables)
+TRIAGE_MAX_HASH_DISTANCE = int(os.getenv("TRIAGE_MAX_HASH_DISTANCE", "4"))
+# Largest grey level difference between the thumbnails of two images with close hashes for them
+# to count as the same; sparse screenshots hash alike, whatever text they show
+TRIAGE_MAX_PIXEL_DIFFERENCE = int(os.getenv("TRIAGE_MAX_PIXEL_DIFFERENCE", "40"))
+
+SKIP_REASONS = ("too_small", "low_entropy", "low_variance", "near_duplicate")
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Compute a 64-bit difference hash: re-encoded or slightly rescaled copies
+    of an image end up within a few bits of each other.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return bits
+
+
+def hash_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def comparison_thumbnail(image: Image.Image, size: int = 128) -> Image.Image:
+    """Greyscale thumbnail at a fixed size, so rescaled copies line up pixel for pixel"""
+    return image.convert("L").resize((size, size), Image.BILINEAR)
+
+
+def max_difference(a: Image.Image, b: Image.Image) -> int:
+    return ImageChops.difference(a, b).getextrema()[1]
+
+
+def contrast(image: Image.Image, outliers: float = 0.0001) -> int:
+    """
+    Grey level range of the image at full resolution, ignoring the given fraction
+    of pixels at each end (noise). Thin strokes such as text keep their full contrast,
+    which a thumbnail would average away.
+    """
+    histogram = image.convert("L").histogram()
+    skip = sum(histogram) * outliers
+    low, seen = 0, 0
+    for level, count in enumerate(histogram):
+        seen += count
+        if seen > skip:
+            low = level
+            break
+    high, seen = 255, 0
+    for level in range(255, -1, -1):
+        seen += histogram[level]
+        if seen > skip:
+            high = level
+            break
+    return max(0, high - low)
+
+
+class ImageTriage:
+    """
+    Filters the images of one document, page by page, dropping decorative images
+    (too small, flat or low-information) and near-duplicates of images already kept
+    on the same page. Pages are triaged independently, so a page re-processed on
+    its own keeps the same images. Keeps counts of what was skipped and why.
+    """
+
+    def __init__(self, min_area: int = TRIAGE_MIN_AREA, min_entropy: float = TRIAGE_MIN_ENTROPY,
+                 min_stddev: float = TRIAGE_MIN_STDDEV, max_hash_distance: int = TRIAGE_MAX_HASH_DISTANCE,
+                 enabled: bool = IMAGE_TRIAGE_ENABLED, min_contrast: int = TRIAGE_MIN_CONTRAST,
+                 max_pixel_difference: int = TRIAGE_MAX_PIXEL_DIFFERENCE):
+        self.min_area = min_area
+        self.min_entropy = min_entropy
+        self.min_stddev = min_stddev
+        self.min_contrast = min_contrast
+        self.max_pixel_difference = max_pixel_difference
+        self.max_hash_distance = max_hash_distance
+        self.enabled = enabled
+        self.seen_hashes = []
+        self.total = 0
+        self.skipped = {reason: 0 for reason in SKIP_REASONS}
+
+    def skip_reason(self, image: Image.Image):
+        """Return why the image should be skipped, or None to keep it."""
+        width, height = image.size
+        if width * height < self.min_area:
+            return "too_small"
+
+        # Only near-solid images are dropped for their statistics: anything with
+        # strong contrast, like text or a diagram, may be what OCR is needed for
+        if contrast(image) < self.min_contrast:
+            # Statistics on a thumbnail are close enough and much cheaper
+            sample = image.copy()
+            sample.thumbnail((128, 128))
+            if sample.convert("L").entropy() < self.min_entropy:
+                return "low_entropy"
+            stddev = ImageStat.Stat(sample).stddev
+            if sum(stddev) / len(stddev) < self.min_stddev:
+                return "low_variance"
+
+        if self.max_hash_distance >= 0:
+            image_hash = difference_hash(image)
+            thumbnail = None
+            for seen_hash, seen_thumbnail in self.seen_hashes:
+                if hash_distance(image_hash, seen_hash) > self.max_hash_distance:
+                    continue
+                # Close hashes only shortlist: confirm on the pixels
+                thumbnail = thumbnail or comparison_thumbnail(image)
+                if max_difference(thumbnail, seen_thumbnail) <= self.max_pixel_difference:
+                    return "near_duplicate"
+            self.seen_hashes.append((image_hash, thumbnail or comparison_thumbnail(image)))
+        return None
+
+    def filter(self, entries: list) -> list:
+        """Return the image entries (dicts with an 'image' key) of one page worth analysing."""
+        self.seen_hashes = []
+        if not self.enabled:
+            self.total += len(entries)
+            return list(entries)
+        kept = []
+        for entry in entries:
+            self.total += 1
+            reason = self.skip_reason(entry["image"])
+            if reason is None:
+                kept.append(entry)
+            else:
+                self.skipped[reason] += 1
+        return kept
+
+    def report(self) -> dict:
+        skipped = sum(self.skipped.values())
+        return {
+            "images_found": self.total,
+            "images_analysed": self.total - skipped,
+            "images_skipped": skipped,
+            "skipped_by_reason": dict(self.skipped),
+        }
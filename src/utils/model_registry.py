@@ -0,0 +1,156 @@
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Unload models that have not been used for this many seconds (0 disables unloading)
+MODEL_IDLE_TIMEOUT = float(os.getenv("MODEL_IDLE_TIMEOUT", "0"))
+# Comma-separated model names to load at startup, or "all"
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "")
+
+
+class ModelRegistry:
+    """
+    Keeps track of heavy models, loading each one on first use (or through warm_up)
+    and unloading it again once it has been idle for longer than idle_timeout seconds.
+    """
+
+    def __init__(self, idle_timeout: float = MODEL_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._models = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def register(self, name: str, loader) -> None:
+        """Register a model under name; loader() is called to load it."""
+        with self._lock:
+            self._models[name] = {
+                "loader": loader,
+                "model": None,
+                "state": "unloaded",
+                "lock": threading.Lock(),
+                "in_use": 0,
+                "loaded_at": None,
+                "last_used": None,
+                "load_seconds": None,
+                "error": None,
+            }
+
+    def _entry(self, name: str) -> dict:
+        try:
+            return self._models[name]
+        except KeyError:
+            raise KeyError(f"Unknown model: {name}")
+
+    def _load(self, name: str):
+        entry = self._entry(name)
+        with entry["lock"]:
+            if entry["model"] is None:
+                entry["state"] = "loading"
+                start_time = time.time()
+                try:
+                    entry["model"] = entry["loader"]()
+                except Exception as e:
+                    entry["state"] = "failed"
+                    entry["error"] = str(e)
+                    raise
+                entry["state"] = "loaded"
+                entry["error"] = None
+                entry["loaded_at"] = time.time()
+                entry["load_seconds"] = round(entry["loaded_at"] - start_time, 2)
+                self._start_reaper()
+            return entry["model"]
+
+    def get(self, name: str):
+        """Return the loaded model, loading it first if needed."""
+        model = self._load(name)
+        self._entry(name)["last_used"] = time.time()
+        return model
+
+    @contextmanager
+    def use(self, name: str):
+        """Hold the model for the duration of the block so it is not unloaded mid-call."""
+        entry = self._entry(name)
+        with self._lock:
+            entry["in_use"] += 1
+        try:
+            yield self.get(name)
+        finally:
+            with self._lock:
+                entry["in_use"] -= 1
+                entry["last_used"] = time.time()
+
+    def warm_up(self, names=None) -> None:
+        """Load the given models (all registered models by default) ahead of first use."""
+        for name in names or list(self._models):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Error warming up model {name}: {e}")
+
+    def unload(self, name: str) -> None:
+        """Drop the model so its memory can be reclaimed; it reloads on next use."""
+        entry = self._entry(name)
+        with entry["lock"]:
+            if entry["model"] is None:
+                return
+            entry["model"] = None
+            entry["state"] = "unloaded"
+            entry["loaded_at"] = None
+        gc.collect()
+
+    def unload_idle(self) -> list:
+        """Unload every model idle for longer than idle_timeout; returns their names."""
+        if self.idle_timeout <= 0:
+            return []
+        now = time.time()
+        unloaded = []
+        for name, entry in list(self._models.items()):
+            with self._lock:
+                idle = (entry["model"] is not None and entry["in_use"] == 0 and
+                        now - (entry["last_used"] or entry["loaded_at"] or now) > self.idle_timeout)
+            if idle:
+                self.unload(name)
+                unloaded.append(name)
+        return unloaded
+
+    def _start_reaper(self) -> None:
+        if self.idle_timeout <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_forever, name="model-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap_forever(self) -> None:
+        interval = max(1.0, min(60.0, self.idle_timeout / 2))
+        while True:
+            time.sleep(interval)
+            for name in self.unload_idle():
+                print(f"Unloaded idle model: {name}")
+
+    def status(self) -> dict:
+        """Load state of every registered model, for health checks."""
+        return {
+            name: {
+                "state": entry["state"],
+                "in_use": entry["in_use"],
+                "load_seconds": entry["load_seconds"],
+                "idle_seconds": round(time.time() - entry["last_used"], 1) if entry["last_used"] else None,
+                "error": entry["error"],
+            }
+            for name, entry in self._models.items()
+        }
+
+
+model_registry = ModelRegistry()
+
+
+def warm_up_models() -> None:
+    """Startup hook: load the models listed in WARMUP_MODELS."""
+    names = [name.strip() for name in WARMUP_MODELS.split(",") if name.strip()]
+    if not names:
+        return
+    model_registry.warm_up(None if names == ["all"] else names)
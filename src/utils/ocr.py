@@ -4,7 +4,7 @@ import pytesseract
 # # Add this to the top of ocr.py if Tesseract isn't in PATH
 # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-def extract_text_from_image(image: Image.Image) -> str:
+def extract_text_from_image(image: Image.Image):
     """
     Extract text from an image using OCR.
     
@@ -12,12 +12,26 @@ def extract_text_from_image(image: Image.Image) -> str:
         image (Image.Image): PIL Image object to process
         
     Returns:
-        str: Extracted text from the image
+        str: Extracted text from the image, or None when OCR failed
     """
     try:
         text = pytesseract.image_to_string(image)
         return text.strip()
     except Exception as e:
         print(f"Error during OCR processing: {e}")
-        return ""
+        return None
 
+
+_ocr_version = None
+
+def get_ocr_version() -> str:
+    """
+    Identify the OCR engine in use, so cached OCR results can be tied to it.
+    """
+    global _ocr_version
+    if _ocr_version is None:
+        try:
+            _ocr_version = f"tesseract-{pytesseract.get_tesseract_version()}"
+        except Exception:
+            _ocr_version = "tesseract-unknown"
+    return _ocr_version
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from .disk_cache import DiskCache
+from .document_registry import get_document_registry
+
+# Search results kept in memory per process (0 disables the retrieval cache)
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+# Seconds a cached result is served, even when nothing was ingested since
+RETRIEVAL_CACHE_TTL_SECONDS = float(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "300"))
+# SQLite file sharing results between the processes of a host; empty keeps the cache in-process
+RETRIEVAL_CACHE_PATH = os.getenv("RETRIEVAL_CACHE_PATH", "")
+RETRIEVAL_CACHE_MAX_ENTRIES = int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "50000"))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Query as cached: case, spacing and surrounding punctuation don't matter"""
+    return _WHITESPACE.sub(" ", query.lower()).strip(" \t\n?!.,;:")
+
+
+class RetrievalCache:
+    """
+    Caches search results by collection, normalized query and search parameters.
+
+    Entries live in a per-process LRU of max_entries, backed by an optional DiskCache
+    shared by the processes of the host. An entry is served for ttl_seconds at most,
+    and only while the collection is at the version it was computed for: ingestion
+    bumps the version in the document registry, which invalidates every entry of
+    the collection at once, in every process.
+    """
+
+    def __init__(self, max_entries: int = None, ttl_seconds: float = None, shared: DiskCache = None,
+                 version=None):
+        self.max_entries = RETRIEVAL_CACHE_SIZE if max_entries is None else max_entries
+        self.ttl_seconds = RETRIEVAL_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.shared = shared
+        # version(collection) returns the collection's current version
+        self.version = version or get_document_registry().collection_version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"memory_hits": 0, "shared_hits": 0, "misses": 0, "stale": 0}
+
+    @staticmethod
+    def key(collection: str, query: str, params: dict) -> str:
+        data = json.dumps([collection, normalize_query(query), params], sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def _valid(self, value: bytes, version: int) -> bool:
+        entry = json.loads(value)
+        return entry["version"] == version and time.time() - entry["created"] < self.ttl_seconds
+
+    def _get_memory(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key: str):
+        if self.shared is None:
+            return None
+        try:
+            return self.shared.get(key)
+        except Exception as e:
+            print(f"Retrieval cache lookup error: {e}")
+            return None
+
+    def _set_shared(self, key: str, value: bytes) -> None:
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(key, value)
+        except Exception as e:
+            print(f"Retrieval cache write error: {e}")
+
+    def get_or_search(self, collection: str, query: str, params: dict, search):
+        """
+        Return the cached results of the search, or run search() and cache what it
+        returns (JSON-serializable results). Callers get their own copy either way.
+        """
+        try:
+            version = self.version(collection)
+        except Exception as e:
+            print(f"Retrieval cache version lookup error: {e}")
+            return search()
+        key = self.key(collection, query, params)
+
+        stale = False
+        value = self._get_memory(key)
+        if value is not None:
+            if self._valid(value, version):
+                self._count("memory_hits")
+                return json.loads(value)["results"]
+            stale = True
+        # Another process may have searched since
+        value = self._get_shared(key)
+        if value is not None:
+            if self._valid(value, version):
+                self._count("shared_hits")
+                self._set_memory(key, value)
+                return json.loads(value)["results"]
+            stale = True
+
+        self._count("stale" if stale else "misses")
+        results = search()
+        # Stored under the version read before searching, so an ingestion that
+        # finishes during the search leaves the entry already stale
+        value = json.dumps({"version": version, "created": time.time(), "results": results}).encode("utf-8")
+        self._set_memory(key, value)
+        self._set_shared(key, value)
+        return json.loads(value)["results"]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process; lookups finding only stale entries count as stale."""
+        with self._lock:
+            counts = dict(self.counts)
+            entries = len(self._entries)
+        hits = counts["memory_hits"] + counts["shared_hits"]
+        total = hits + counts["misses"] + counts["stale"]
+        return {
+            "enabled": True,
+            **counts,
+            "entries": entries,
+            "hit_rate": round(hits / total, 3) if total else None,
+            "shared": self.shared is not None,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_retrieval_cache():
+    """Return the retrieval cache shared by the process, or None when it is disabled."""
+    global _cache
+    with _cache_lock:
+        if _cache is None and RETRIEVAL_CACHE_SIZE > 0:
+            shared = DiskCache(RETRIEVAL_CACHE_PATH, RETRIEVAL_CACHE_MAX_ENTRIES) if RETRIEVAL_CACHE_PATH else None
+            _cache = RetrievalCache(shared=shared)
+        return _cache
+
+
+def retrieval_cache_stats() -> dict:
+    cache = get_retrieval_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
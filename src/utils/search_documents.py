@@ -1,52 +1,61 @@
-from .vector_store import VectorStore
+from .vector_store import get_vector_store
 from typing import List, Dict, Optional
 
 def search_documents(
-    query: str, 
+    query: str,
     content_types: Optional[List[str]] = None,
-    limit: int = 5
+    limit: int = 5,
+    offset: int = 0,
+    doc_ids: Optional[List[str]] = None,
+    file_types: Optional[List[str]] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    dense_weight: Optional[float] = None,
+    sparse_weight: Optional[float] = None
 ) -> List[Dict]:
     """
     Search for similar content across all stored document data
-    
+
     Args:
         query: Search query text
-        content_types: Optional list of content types to search ('text', 'table', 'ocr', 'caption')
+        content_types: Optional list of content types to search ('text', 'table', 'image')
         limit: Maximum number of results to return
+        offset: Number of best results to skip, for pagination
+        doc_ids: Optional list of document IDs to search within
+        file_types: Optional list of file extensions to search within (e.g. '.pdf')
+        date_from: Optional earliest date the content was added (ISO 8601)
+        date_to: Optional latest date the content was added (ISO 8601)
+        dense_weight: Optional weight of the embedding ranking in hybrid search
+        sparse_weight: Optional weight of the BM25 keyword ranking in hybrid search (0 for dense-only)
     """
-    vector_store = VectorStore()
-    
-    # Prepare search filters
-    search_filter = None
-    if content_types:
-        search_filter = {
-            "must": [
-                {
-                    "key": "content_type",
-                    "match": {
-                        "any": content_types
-                    }
-                }
-            ]
-        }
-    
-    # Search in Qdrant
+    vector_store = get_vector_store()
+
+    # Filters are pushed down to Qdrant
     results = vector_store.search(
         query=query,
-        filter=search_filter,
-        limit=limit
+        limit=limit,
+        offset=offset,
+        content_types=content_types,
+        doc_ids=doc_ids,
+        file_types=file_types,
+        date_from=date_from,
+        date_to=date_to,
+        dense_weight=dense_weight,
+        sparse_weight=sparse_weight
     )
-    
+
     # Format results
     formatted_results = []
     for result in results:
+        metadata = result['metadata']
         formatted_results.append({
-            'score': result.score,
-            'content_type': result.payload['content_type'],
-            'source': result.payload['source_info'],
-            'content': result.payload['content'],
-            'metadata': {k: v for k, v in result.payload.items() 
-                        if k not in ['content_type', 'source_info', 'content']}
+            'id': result['id'],
+            'score': result['score'],
+            'content_type': metadata.get('content_type'),
+            'source': metadata.get('source'),
+            'content': result['content'],
+            'metadata': {k: v for k, v in metadata.items()
+                        if k not in ['content_type', 'source']}
         })
-    
-    return formatted_results
\ No newline at end of file
+
+    return formatted_results
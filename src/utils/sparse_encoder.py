@@ -0,0 +1,83 @@
+import os
+import re
+import zlib
+from collections import Counter
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Typical chunk length in terms, the length BM25 normalizes towards
+BM25_AVG_TERMS = float(os.getenv("BM25_AVG_TERMS", "120"))
+
+# Words, numbers and identifiers such as obj.method, snake_case, ERR-404, CS-101 or config.yaml
+_TERM = re.compile(r"\w+(?:[.\-:/]\w+)*")
+# Parts of compound identifiers, also indexed so "method" finds "obj.method"
+_PART_SEPARATOR = re.compile(r"[.\-:/_]+|(?<=[a-z])(?=[A-Z])")
+
+
+def tokenize(text: str) -> list:
+    """
+    Terms of text for keyword matching: lowercased words and whole identifiers,
+    followed by the parts of each compound identifier.
+    """
+    terms = []
+    for match in _TERM.finditer(text):
+        term = match.group()
+        parts = [part for part in _PART_SEPARATOR.split(term) if part]
+        terms.append(term.lower())
+        if len(parts) > 1:
+            terms.extend(part.lower() for part in parts)
+    return terms
+
+
+def term_index(term: str) -> int:
+    """Stable sparse vector dimension of a term, the same in every process"""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+class BM25SparseEncoder:
+    """
+    Encodes text into sparse vectors scored like BM25 by a dot product.
+
+    Chunks get each term's saturated, length-normalized frequency; queries get a
+    weight of 1 per distinct term. The inverse document frequency is left to Qdrant
+    (a sparse vector with the IDF modifier), which keeps it current as the collection
+    changes. Terms are hashed to dimensions, so no vocabulary has to be stored.
+    """
+
+    def __init__(self, k1: float = None, b: float = None, avg_terms: float = None):
+        self.k1 = BM25_K1 if k1 is None else k1
+        self.b = BM25_B if b is None else b
+        self.avg_terms = avg_terms or BM25_AVG_TERMS
+
+    @staticmethod
+    def _vector(weights: dict) -> tuple:
+        indices = sorted(weights)
+        return indices, [weights[index] for index in indices]
+
+    def encode_document(self, text: str) -> tuple:
+        """Return (indices, values) of the chunk's sparse vector; both empty without terms"""
+        terms = tokenize(text)
+        counts = Counter(term_index(term) for term in terms)
+        norm = self.k1 * (1 - self.b + self.b * len(terms) / self.avg_terms)
+        return self._vector({
+            index: count * (self.k1 + 1) / (count + norm) for index, count in counts.items()
+        })
+
+    def encode_query(self, text: str) -> tuple:
+        """Return (indices, values) of the query's sparse vector"""
+        return self._vector({term_index(term): 1.0 for term in tokenize(text)})
+
+
+def weighted_rrf(rankings: list, weights: list, k: int = 60) -> list:
+    """
+    Fuse ranked lists of IDs with weighted reciprocal rank fusion: each list adds
+    weight / (k + rank) to the IDs it ranks. Returns (ID, fused score) pairs, best first.
+    """
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
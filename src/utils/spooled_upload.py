@@ -0,0 +1,149 @@
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+
+# Requests up to this size keep their uploads in memory; larger ones spill each file to a temp file
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("UPLOAD_SPOOL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+
+def spool_stream(total_content_length, filename=None, max_size: int = UPLOAD_SPOOL_MAX_BYTES):
+    """
+    Return the stream a multipart upload is written to while the request is parsed:
+    an in-memory buffer when the whole request fits in max_size, otherwise a named
+    temp file (removed when closed) that parsers can open by path.
+    """
+    if total_content_length is not None and total_content_length <= max_size:
+        return io.BytesIO()
+    suffix = os.path.splitext(filename)[1] if filename else ""
+    return tempfile.NamedTemporaryFile(mode="w+b", suffix=suffix)
+
+
+class SpooledUpload:
+    """
+    An uploaded file processed where it already is, in memory or in its spill
+    file, instead of being saved under uploads/ and read back.
+    """
+
+    def __init__(self, filename: str, stream):
+        self.filename = filename
+        self.stream = stream
+
+    @property
+    def path(self):
+        """Path of the temp file the upload spilled to, or None while it is in memory."""
+        name = getattr(self.stream, "name", None)
+        if not (isinstance(name, str) and os.path.isfile(name)):
+            return None
+        # Readers open the file by path, so buffered writes must reach it first
+        self.stream.flush()
+        return name
+
+    def open(self):
+        """Return the upload's stream rewound to the start."""
+        self.stream.seek(0)
+        return self.stream
+
+    def read(self) -> bytes:
+        if isinstance(self.stream, io.BytesIO):
+            return self.stream.getvalue()
+        return self.open().read()
+
+    def close(self) -> None:
+        self.stream.close()
+
+    def __repr__(self):
+        return f"SpooledUpload({self.filename!r})"
+
+
+def source_name(source, default: str = "") -> str:
+    """File name of a document source: a path, a SpooledUpload or a named file object."""
+    if isinstance(source, SpooledUpload):
+        return source.filename
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(source)
+    name = getattr(source, "name", None)
+    return os.path.basename(name) if isinstance(name, str) else default
+
+
+def source_path(source):
+    """Path to the source on disk, or None when it only exists in memory."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, SpooledUpload):
+        return source.path
+    return None
+
+
+def open_source(source):
+    """
+    Return something pdfplumber, python-docx, python-pptx and PIL can all open:
+    the path when the source is on disk, otherwise a seekable stream at its start.
+    """
+    path = source_path(source)
+    if path is not None:
+        return path
+    if isinstance(source, SpooledUpload):
+        return source.open()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def read_source(source) -> bytes:
+    """Return the whole content of a path, bytes, SpooledUpload or file object."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, SpooledUpload):
+        return source.read()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if isinstance(source, io.BytesIO):
+        return source.getvalue()
+    source.seek(0)
+    return source.read()
+
+
+def iter_source_blocks(source, block_size: int = 1024 * 1024):
+    """Yield the content of a source in blocks, without loading files on disk whole."""
+    path = source_path(source)
+    if path is not None:
+        with open(path, "rb") as f:
+            yield from iter(lambda: f.read(block_size), b"")
+        return
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+        return
+    stream = open_source(source)
+    yield from iter(lambda: stream.read(block_size), b"")
+
+
+def open_pdf_document(source):
+    """Open a PDF source with PyMuPDF, by path when it is on disk, otherwise from its bytes."""
+    import fitz  # PyMuPDF
+
+    path = source_path(source)
+    if path is not None:
+        return fitz.open(path)
+    return fitz.open(stream=read_source(source), filetype="pdf")
+
+
+@contextmanager
+def source_on_disk(source, suffix: str = ""):
+    """
+    Yield a path to the source: its own when it is on disk, otherwise a temp file
+    it is written to once (and removed on exit), so other processes can open it.
+    """
+    path = source_path(source)
+    if path is not None:
+        yield path
+        return
+    with tempfile.NamedTemporaryFile(mode="wb", suffix=suffix, delete=False) as f:
+        for block in iter_source_blocks(source):
+            f.write(block)
+    try:
+        yield f.name
+    finally:
+        os.remove(f.name)
@@ -0,0 +1,71 @@
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Accumulates wall time per pipeline stage. Stages nest: while an inner stage
+    runs, the outer one is paused, so each stage reports its own time only.
+    This keeps the breakdown right when parsing, image analysis and embedding
+    are interleaved by the streaming pipeline.
+    on_stage(stage) is called whenever the active stage changes.
+    """
+
+    def __init__(self, on_stage=None):
+        self.on_stage = on_stage
+        self.seconds = {}
+        self._stack = []
+        self._since = None
+
+    def _charge(self, now):
+        if self._stack:
+            stage = self._stack[-1]
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + (now - self._since)
+        self._since = now
+
+    def _notify(self):
+        if self.on_stage is not None:
+            try:
+                self.on_stage(self._stack[-1] if self._stack else None)
+            except Exception as e:
+                print(f"Error reporting stage progress: {e}")
+
+    @contextmanager
+    def stage(self, name: str):
+        self._charge(time.time())
+        self._stack.append(name)
+        self._notify()
+        try:
+            yield
+        finally:
+            self._charge(time.time())
+            self._stack.pop()
+            self._notify()
+
+    def timed_iter(self, iterable, name: str):
+        """Yield from iterable, charging the time spent producing each item to stage name."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def report(self) -> dict:
+        return {stage: round(seconds, 2) for stage, seconds in self.seconds.items()}
+
+
+class NullTimer:
+    """Stand-in for StageTimer when nobody needs the breakdown."""
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def timed_iter(self, iterable, name: str):
+        return iterable
+
+    def report(self) -> dict:
+        return {}
@@ -2,81 +2,121 @@ import os
 import pdfplumber
 from docx import Document
 from pptx import Presentation
+from .spooled_upload import open_source, source_name
 
-def extract_tables_from_pdf(pdf_path, output_folder):
-    os.makedirs(output_folder, exist_ok=True)
-    all_tables_text = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            tables = page.extract_tables()
-            for table_index, table in enumerate(tables):
-                # Filter out None values and convert to strings
-                clean_table = [[str(cell).strip() if cell else "" for cell in row] for row in table]
-                if clean_table:  # Only add tables that have content
-                    table_text = f"[PDF Page {page_num} - Table {table_index+1}]\n"
-                    table_text += "\n".join([" | ".join(row) for row in clean_table])
-                    all_tables_text.append(table_text)
+# Only run pdfplumber's table finder on pages with enough ruling lines to form a table
+TABLE_PRESCREEN_ENABLED = os.getenv("TABLE_PRESCREEN_ENABLED", "true").lower() == "true"
 
-    # Save extracted tables to a text file
-    if all_tables_text:
-        table_file_path = os.path.join(output_folder, "tables.txt")
-        with open(table_file_path, 'w', encoding='utf-8') as f:
-            f.write("\n\n".join(all_tables_text))
+def pdf_page_may_have_tables(page):
+    """
+    Cheap check for whether pdfplumber's default table finder can find anything on a page.
+    With the default "lines" strategy, tables are built from ruling edges (lines,
+    rectangles and curves) and must have at least two cells, which takes three edges
+    in one direction and two in the other; a lone frame or background rectangle does
+    not qualify. Snapping and joining only ever merge edges, so pages below that count
+    are skipped without losing any table. Uses the layout objects already parsed for
+    the page's text.
+    """
+    horizontal = vertical = 0
+    for edge in page.edges:
+        orientation = edge.get("orientation")
+        if orientation == "h":
+            horizontal += 1
+        elif orientation == "v":
+            vertical += 1
+        if min(horizontal, vertical) >= 2 and max(horizontal, vertical) >= 3:
+            return True
+    return False
 
-def extract_tables_from_docx(docx_path, output_folder):
-    os.makedirs(output_folder, exist_ok=True)
-    doc = Document(docx_path)
+def pdf_page_tables(page, page_num, prescreen=None):
+    """
+    Return the tagged table blocks found on a single pdfplumber page.
+    Pages failing the ruling-line pre-screen are skipped unless prescreen is False.
+    """
+    if prescreen is None:
+        prescreen = TABLE_PRESCREEN_ENABLED
+    if prescreen and not pdf_page_may_have_tables(page):
+        return []
     tables_text = []
+    for table_index, table in enumerate(page.extract_tables()):
+        # Filter out None values and convert to strings
+        clean_table = [[str(cell).strip() if cell else "" for cell in row] for row in table]
+        if clean_table:  # Only add tables that have content
+            table_text = f"[PDF Page {page_num} - Table {table_index+1}]\n"
+            table_text += "\n".join([" | ".join(row) for row in clean_table])
+            tables_text.append(table_text)
+    return tables_text
 
+def docx_tables(doc):
+    """Return the tagged table blocks of a python-docx Document."""
+    tables_text = []
     for table_index, table in enumerate(doc.tables):
         # Convert table to rows of strings
         table_rows = [[cell.text.strip() for cell in row.cells] for row in table.rows]
         table_text = f"\n[DOCX Table {table_index+1}]\n"
         table_text += "\n".join([" | ".join(row) for row in table_rows])
         tables_text.append(table_text)
+    return tables_text
+
+def pptx_slide_tables(slide, slide_num):
+    """Return the tagged table blocks found on a single python-pptx slide."""
+    tables_text = []
+    for shape_index, shape in enumerate(slide.shapes):
+        # Check if shape is actually a table
+        if hasattr(shape, 'has_table') and shape.has_table:
+            table = shape.table
+            # Verify minimum table structure (at least 2 rows or 2 columns)
+            if len(table.rows) < 2 and len(table.columns) < 2:
+                continue
+
+            # Convert table to rows of strings
+            table_rows = []
+            for row in table.rows:
+                row_data = [cell.text.strip() for cell in row.cells]
+                table_rows.append(row_data)
 
+            table_text = f"[PPTX Slide {slide_num} - Table {shape_index+1}]\n"
+            table_text += "\n".join([" | ".join(row) for row in table_rows])
+            tables_text.append(table_text)
+    return tables_text
+
+def save_table_blocks(tables_text, output_folder):
     # Save extracted tables to a text file
     if tables_text:
         table_file_path = os.path.join(output_folder, "tables.txt")
         with open(table_file_path, 'w', encoding='utf-8') as f:
             f.write("\n\n".join(tables_text))
 
+def extract_tables_from_pdf(pdf_path, output_folder):
+    os.makedirs(output_folder, exist_ok=True)
+    all_tables_text = []
+
+    with pdfplumber.open(open_source(pdf_path)) as pdf:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            all_tables_text.extend(pdf_page_tables(page, page_num))
+
+    save_table_blocks(all_tables_text, output_folder)
+
+def extract_tables_from_docx(docx_path, output_folder):
+    os.makedirs(output_folder, exist_ok=True)
+    doc = Document(open_source(docx_path))
+    save_table_blocks(docx_tables(doc), output_folder)
+
 def extract_tables_from_pptx(pptx_path, output_folder):
     os.makedirs(output_folder, exist_ok=True)
-    prs = Presentation(pptx_path)
+    prs = Presentation(open_source(pptx_path))
     tables_text = []
 
     for slide_index, slide in enumerate(prs.slides):
-        for shape_index, shape in enumerate(slide.shapes):
-            # Check if shape is actually a table
-            if hasattr(shape, 'has_table') and shape.has_table:
-                table = shape.table
-                # Verify minimum table structure (at least 2 rows or 2 columns)
-                if len(table.rows) < 2 and len(table.columns) < 2:
-                    continue
-                    
-                # Convert table to rows of strings
-                table_rows = []
-                for row in table.rows:
-                    row_data = [cell.text.strip() for cell in row.cells]
-                    table_rows.append(row_data)
-                
-                table_text = f"[PPTX Slide {slide_index+1} - Table {shape_index+1}]\n"
-                table_text += "\n".join([" | ".join(row) for row in table_rows])
-                tables_text.append(table_text)
+        tables_text.extend(pptx_slide_tables(slide, slide_index+1))
+
+    save_table_blocks(tables_text, output_folder)
 
-    # Save extracted tables to a text file
-    if tables_text:
-        table_file_path = os.path.join(output_folder, "tables.txt")
-        with open(table_file_path, 'w', encoding='utf-8') as f:
-            f.write("\n\n".join(tables_text))
-        
 def extract_tables_by_format(path, output_folder):
     """
     Extract tables based on file format
     """
-    ext = os.path.splitext(path)[-1].lower()
+    ext = os.path.splitext(source_name(path))[-1].lower()
     if ext == ".pdf":
         return extract_tables_from_pdf(path, output_folder)
     elif ext == ".docx":
@@ -1,58 +1,62 @@
 import os
+from .spooled_upload import open_source, source_name
 
-def extract_text_from_pdf(pdf_path, output_folder):
-    import pdfplumber
-    text_blocks = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            raw_text = page.extract_text()
-            if raw_text:
-                page_text = f"\n[PDF Page {page_num}]\n{raw_text.strip()}"
-                text_blocks.append(page_text)
-    
+def pdf_page_text(page, page_num):
+    """Return the tagged text block of a single pdfplumber page, or None if empty."""
+    raw_text = page.extract_text()
+    if raw_text:
+        return f"\n[PDF Page {page_num}]\n{raw_text.strip()}"
+    return None
+
+def docx_text(doc):
+    """Return the non-empty paragraphs of a python-docx Document as text blocks."""
+    return [para.text.strip() for para in doc.paragraphs if para.text.strip()]
+
+def pptx_slide_text(slide, slide_num):
+    """Return the tagged text block of a single python-pptx slide."""
+    slide_text = f"\n[PPTX Slide {slide_num}]\n"
+    for shape in slide.shapes:
+        if shape.has_text_frame:
+            text = shape.text.strip()
+            if text:
+                slide_text += text + "\n"
+    return slide_text.strip()
+
+def save_text_blocks(text_blocks, output_folder):
     output_text = "\n".join(text_blocks)
     os.makedirs(output_folder, exist_ok=True)
     output_path = os.path.join(output_folder, "extracted_text.txt")
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(output_text)
 
-def extract_text_from_docx(docx_path, output_folder):
-    from docx import Document
-    doc = Document(docx_path)
+def extract_text_from_pdf(pdf_path, output_folder):
+    import pdfplumber
     text_blocks = []
+    with pdfplumber.open(open_source(pdf_path)) as pdf:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            page_text = pdf_page_text(page, page_num)
+            if page_text:
+                text_blocks.append(page_text)
 
-    for para in doc.paragraphs:
-        if para.text.strip():  # ignore empty lines
-            text_blocks.append(para.text.strip())
+    save_text_blocks(text_blocks, output_folder)
 
-    output_text = "\n".join(text_blocks)
-    os.makedirs(output_folder, exist_ok=True)
-    output_path = os.path.join(output_folder, "extracted_text.txt")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(output_text)
+def extract_text_from_docx(docx_path, output_folder):
+    from docx import Document
+    doc = Document(open_source(docx_path))
+    save_text_blocks(docx_text(doc), output_folder)
 
 def extract_text_from_pptx(pptx_path, output_folder):
     from pptx import Presentation
-    prs = Presentation(pptx_path)
+    prs = Presentation(open_source(pptx_path))
     text_blocks = []
 
     for slide_num, slide in enumerate(prs.slides, start=1):
-        slide_text = f"\n[PPTX Slide {slide_num}]\n"
-        for shape in slide.shapes:
-            if shape.has_text_frame:
-                text = shape.text.strip()
-                if text:
-                    slide_text += text + "\n"
-        text_blocks.append(slide_text.strip())
+        text_blocks.append(pptx_slide_text(slide, slide_num))
 
-    output_text = "\n".join(text_blocks)
-    os.makedirs(output_folder, exist_ok=True)
-    output_path = os.path.join(output_folder, "extracted_text.txt")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(output_text)
+    save_text_blocks(text_blocks, output_folder)
 
 def extract_text_by_format(path, output_folder):
-    ext = os.path.splitext(path)[-1].lower()
+    ext = os.path.splitext(source_name(path))[-1].lower()
     if ext == ".pdf":
         return extract_text_from_pdf(path, output_folder)
     elif ext == ".docx":
@@ -60,4 +64,4 @@ def extract_text_by_format(path, output_folder):
     elif ext == ".pptx":
         return extract_text_from_pptx(path, output_folder)
     else:
-        return "[Unsupported file type]"
\ No newline at end of file
+        return "[Unsupported file type]"
@@ -1,194 +1,532 @@
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from langchain_qdrant import QdrantVectorStore  # Add this import
-from langchain_nvidia_ai_endpoints import NVIDIAEmbeddings
 import uuid
 import os
+import threading
 import dotenv
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from .chunker import TextChunker
+from .embedding_cache import CachedEmbeddings
+from .collection_profile import CollectionProfile, SPARSE_VECTOR_NAME
+from .sparse_encoder import BM25SparseEncoder, weighted_rrf
+from .retrieval_cache import get_retrieval_cache
+from .embedders import NVIDIA_EMBEDDING_MODEL, create_embedder, embedder_id
 
 # Load environment variables
 dotenv.load_dotenv()
 
 QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
-EMBEDDING_MODEL_NAME = "nv-embed-v1"  # Update to match working example
+# Collection holding the chunks; use a separate one per embedding backend
+VECTOR_COLLECTION = os.getenv("VECTOR_COLLECTION", "document_store")
 
-def generate_chunk_id(base_id: str, chunk_index: int) -> str:
-    """Generate a deterministic UUID for a document chunk based on base ID and chunk index"""
+# Chunks sent in one embedding request, and points written in one Qdrant upsert
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "128"))
+# Upsert batches embedded and written at once, per document and across the process
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+# Default weights of dense (embedding) and sparse (BM25 keyword) rankings in hybrid search; 0 turns one off
+SEARCH_DENSE_WEIGHT = float(os.getenv("SEARCH_DENSE_WEIGHT", "1.0"))
+SEARCH_SPARSE_WEIGHT = float(os.getenv("SEARCH_SPARSE_WEIGHT", "1.0"))
+# Hybrid search fuses this many times the requested results from each ranking
+HYBRID_PREFETCH_FACTOR = int(os.getenv("HYBRID_PREFETCH_FACTOR", "4"))
+# Reciprocal rank fusion constant: higher values flatten the advantage of top ranks
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+_embed_pool = None
+_embed_pool_lock = threading.Lock()
+
+
+def _get_embed_pool() -> ThreadPoolExecutor:
+    """Return the thread pool shared by all chunk writes, creating it on first use."""
+    global _embed_pool
+    with _embed_pool_lock:
+        if _embed_pool is None:
+            _embed_pool = ThreadPoolExecutor(max_workers=max(1, EMBED_CONCURRENCY), thread_name_prefix="embed")
+        return _embed_pool
+
+def generate_chunk_id(base_id: str, chunk_index) -> str:
+    """
+    Generate a deterministic UUID for a document chunk based on base ID and
+    chunk index (or any chunk key unique within the document)
+    """
     # Create a namespace UUID from the base document ID
     namespace = uuid.UUID(base_id)
     # Generate a new UUID using the chunk index as name
     return str(uuid.uuid5(namespace, str(chunk_index)))
 
+def _chunk_failure(chunk_metadata: dict, stage: str, error: Exception) -> dict:
+    """Describe a chunk that could not be stored, and at which stage"""
+    return {
+        "chunk_id": chunk_metadata["chunk_id"],
+        "content_type": chunk_metadata["content_type"],
+        "page": chunk_metadata.get("page"),
+        "chunk_index": chunk_metadata["chunk_index"],
+        "stage": stage,
+        "error": str(error),
+    }
+
+
+class BulkWriter:
+    """
+    Stores the chunks of one document in bulk: chunks are grouped into batches of
+    upsert_batch_size points, each embedded embed_batch_size chunks per request and
+    written with a single upsert. At most max_in_flight batches run at once on the
+    shared embedding pool, while the caller keeps adding chunks.
+    """
+
+    def __init__(self, store, embed_batch_size: int = None, upsert_batch_size: int = None,
+                 max_in_flight: int = None):
+        self.store = store
+        self.embed_batch_size = max(1, embed_batch_size or EMBED_BATCH_SIZE)
+        self.upsert_batch_size = max(1, upsert_batch_size or UPSERT_BATCH_SIZE)
+        self.max_in_flight = max(1, max_in_flight or EMBED_CONCURRENCY)
+        self.pending = []
+        self.in_flight = deque()
+        self.stored = []
+        self.failed = []
+
+    def add(self, text: str, chunk_metadata: dict) -> None:
+        self.pending.append((text, chunk_metadata))
+        if len(self.pending) >= self.upsert_batch_size:
+            self._submit()
+
+    def _submit(self) -> None:
+        batch, self.pending = self.pending, []
+        while len(self.in_flight) >= self.max_in_flight:
+            self._collect(self.in_flight.popleft())
+        self.in_flight.append(_get_embed_pool().submit(self.store._write_batch, batch, self.embed_batch_size))
+
+    def _collect(self, future) -> None:
+        stored, failed = future.result()
+        self.stored.extend(stored)
+        self.failed.extend(failed)
+
+    def finish(self) -> tuple:
+        """
+        Write the remaining chunks and wait for every batch.
+        Returns (metadata of the stored chunks, failures of the others) in submission order.
+        """
+        if self.pending:
+            self._submit()
+        while self.in_flight:
+            self._collect(self.in_flight.popleft())
+        return self.stored, self.failed
+
+
 class VectorStore:
-    def __init__(self, collection_name="document_store"):
+    def __init__(self, collection_name=VECTOR_COLLECTION):
         self.collection_name = collection_name
+        self.chunker = TextChunker()
+        # Embeddings of the configured backend, behind the shared embedding cache
+        self.embedder = embedder_id()
+        self.encoder = CachedEmbeddings(create_embedder(), self.embedder)
         
-        try:
-            # Initialize NVIDIA embeddings
-            self.encoder = NVIDIAEmbeddings(
-                model_name=EMBEDDING_MODEL_NAME,
-                nvidia_api_key=os.getenv("NVIDIA_API_KEY")
+        client = QdrantClient(url=QDRANT_URL, prefer_grpc=True)
+        self.profile = CollectionProfile()
+        if client.collection_exists(collection_name):
+            # Bring collections created with older settings in line with the profile
+            changes = self.profile.migrate(client, collection_name, QdrantVectorStore.VECTOR_NAME)
+            if changes:
+                print(f"Updated collection {collection_name}: {', '.join(changes)}")
+        else:
+            self.profile.create(
+                client, collection_name,
+                vector_size=len(self.encoder.embed_query("dimension probe")),
+                vector_name=QdrantVectorStore.VECTOR_NAME
             )
-            
-            # Initialize QdrantVectorStore instead of direct client
-            self.vectorstore = QdrantVectorStore.from_existing_collection(
-                collection_name=collection_name,
-                embedding=self.encoder,
-                url=QDRANT_URL,
-                prefer_grpc=True
-            )
-            
-        except Exception as e:
-            # Try creating new collection if it doesn't exist
-            self.vectorstore = QdrantVectorStore.from_documents(
-                documents=[],  # Start with empty collection
-                embedding=self.encoder,
-                collection_name=collection_name,
-                url=QDRANT_URL,
-                prefer_grpc=True
+        self.vectorstore = QdrantVectorStore(
+            client=client,
+            collection_name=collection_name,
+            embedding=self.encoder
+        )
+        self._check_embedder()
+
+        # Collections created before hybrid search have no sparse vectors and stay dense-only
+        sparse_vectors = client.get_collection(collection_name).config.params.sparse_vectors or {}
+        self.sparse_vector_name = SPARSE_VECTOR_NAME if SPARSE_VECTOR_NAME in sparse_vectors else None
+        self.sparse_encoder = BM25SparseEncoder()
+
+    def _check_embedder(self) -> None:
+        """
+        Refuse a collection filled by another embedder: its vectors live in a different
+        space, so queries and new chunks embedded by this one would not match them.
+        """
+        points, _ = self.vectorstore.client.scroll(
+            collection_name=self.collection_name,
+            limit=1,
+            with_payload=[self.vectorstore.metadata_payload_key]
+        )
+        if not points:
+            return
+        metadata = points[0].payload.get(self.vectorstore.metadata_payload_key) or {}
+        # Chunks stored before embedders were recorded all came from NVIDIA
+        recorded = metadata.get("embedder", f"nvidia:{NVIDIA_EMBEDDING_MODEL}")
+        if recorded != self.embedder:
+            raise ValueError(
+                f"Collection '{self.collection_name}' was embedded with {recorded}, not {self.embedder}; "
+                f"set VECTOR_COLLECTION to another collection or switch EMBEDDING_BACKEND back"
             )
             
     def store_document_content(self, doc_id: str, content: str, content_type: str, 
-                             source_info: str, metadata: dict):
-        """Store document content in vector store with chunking"""
+                             source_info: str, metadata: dict) -> tuple:
+        """
+        Store document content in vector store with chunking.
+        Chunks are upserted under their deterministic IDs, so storing the same content
+        again overwrites it, and chunks left over from a longer earlier version are deleted.
+        Returns (stored chunk IDs, failed chunks).
+        """
         chunks = self._split_content(content)
+        writer = BulkWriter(self)
         
         for i, chunk in enumerate(chunks):
+            writer.add(chunk, {
+                "doc_id": doc_id,
+                "chunk_id": generate_chunk_id(doc_id, f"{content_type}:{i}"),
+                "content_type": content_type,
+                "source": source_info,
+                "chunk_index": i,
+                "total_chunks": len(chunks),
+                "embedder": self.embedder,
+                **metadata
+            })
+        stored, failed = writer.finish()
+        self._delete_points(models.Filter(must=[
+            self._metadata_condition("doc_id", doc_id),
+            self._metadata_condition("content_type", content_type),
+            models.FieldCondition(
+                key=f"{self.vectorstore.metadata_payload_key}.chunk_index",
+                range=models.Range(gte=len(chunks))
+            ),
+        ]))
+        return [chunk_metadata["chunk_id"] for chunk_metadata in stored], failed
+
+    def store_records(self, doc_id: str, records, metadata: dict) -> tuple:
+        """
+        Chunk and store a stream of extraction records as they arrive.
+
+        Each record is a dict with 'page', 'kind' and 'text' keys (and optionally the
+        page 'fingerprint'), where 'kind' is the content type ('text', 'table' or 'image').
+        Records are consumed lazily and chunks are embedded and written in batches in
+        the background, while later pages are still being parsed. Chunk indexes run per
+        content type and page, so re-storing one page never collides with the chunks of
+        the others.
+        Returns ((page, chunk_id) pairs for the chunks stored, failed chunks), where each
+        failure names the chunk, its page, the stage that failed and the error.
+        """
+        chunk_counts = {}
+        writer = BulkWriter(self)
+        for record in records:
+            content_type = record["kind"]
+            page = record.get("page")
+            for chunk in self._split_content(record["text"]):
+                i = chunk_counts.get((content_type, page), 0)
+                chunk_counts[(content_type, page)] = i + 1
+                chunk_metadata = {
+                    "doc_id": doc_id,
+                    "chunk_id": generate_chunk_id(doc_id, f"{content_type}:{page}:{i}"),
+                    "content_type": content_type,
+                    "source": f"{content_type.capitalize()} from {metadata['filename']}",
+                    "chunk_index": i,
+                    "embedder": self.embedder,
+                    **metadata
+                }
+                if page is not None:
+                    chunk_metadata["page"] = page
+                if record.get("fingerprint"):
+                    chunk_metadata["page_fingerprint"] = record["fingerprint"]
+                writer.add(chunk, chunk_metadata)
+        stored, failed = writer.finish()
+        return [(chunk_metadata.get("page"), chunk_metadata["chunk_id"]) for chunk_metadata in stored], failed
+
+    def _write_batch(self, batch: list, embed_batch_size: int) -> tuple:
+        """
+        Embed (text, metadata) pairs embed_batch_size at a time and write them with one upsert.
+        Returns (metadata of the stored chunks, failures), without raising.
+        """
+        points, stored, failed = [], [], []
+        for start in range(0, len(batch), embed_batch_size):
+            sub_batch = batch[start:start + embed_batch_size]
             try:
-                # Use add_texts instead of direct client operations
-                self.vectorstore.add_texts(
-                    texts=[chunk],
-                    metadatas=[{
-                        "doc_id": doc_id,
-                        "chunk_id": generate_chunk_id(doc_id, i),
-                        "content_type": content_type,
-                        "source": source_info,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks),
-                        **metadata
-                    }]
-                )
+                vectors = self.encoder.embed_documents([text for text, _ in sub_batch])
             except Exception as e:
-                print(f"❌ Error storing chunk {i+1}: {str(e)}")
+                print(f"❌ Error embedding {len(sub_batch)} chunks: {str(e)}")
+                failed.extend(_chunk_failure(chunk_metadata, "embed", e) for _, chunk_metadata in sub_batch)
+                continue
+            for (text, chunk_metadata), vector in zip(sub_batch, vectors):
+                point_vectors = {self.vectorstore.vector_name: vector}
+                if self.sparse_vector_name:
+                    indices, values = self.sparse_encoder.encode_document(text)
+                    if indices:
+                        point_vectors[self.sparse_vector_name] = models.SparseVector(indices=indices, values=values)
+                # Same point layout as QdrantVectorStore.add_texts, keyed by the
+                # deterministic chunk ID so re-ingesting overwrites instead of duplicating
+                points.append(models.PointStruct(
+                    id=chunk_metadata["chunk_id"],
+                    vector=point_vectors,
+                    payload={
+                        self.vectorstore.content_payload_key: text,
+                        self.vectorstore.metadata_payload_key: chunk_metadata,
+                    }
+                ))
+                stored.append(chunk_metadata)
+        if not points:
+            return [], failed
+        try:
+            self.vectorstore.client.upsert(collection_name=self.collection_name, points=points)
+        except Exception as e:
+            print(f"❌ Error writing {len(points)} chunks: {str(e)}")
+            failed.extend(_chunk_failure(chunk_metadata, "upsert", e) for chunk_metadata in stored)
+            return [], failed
+        return stored, failed
+
+    def _metadata_condition(self, key: str, value) -> models.FieldCondition:
+        """Match a chunk metadata field, as stored in the payload by QdrantVectorStore"""
+        return models.FieldCondition(
+            key=f"{self.vectorstore.metadata_payload_key}.{key}",
+            match=models.MatchValue(value=value)
+        )
+
+    def delete_document(self, doc_id: str, pages: list = None) -> None:
+        """Delete every chunk stored for a document, or only those of the given pages"""
+        conditions = [self._metadata_condition("doc_id", doc_id)]
+        if pages is not None:
+            if not pages:
+                return
+            conditions.append(models.FieldCondition(
+                key=f"{self.vectorstore.metadata_payload_key}.page",
+                match=models.MatchAny(any=list(pages))
+            ))
+        self._delete_points(models.Filter(must=conditions))
+
+    def delete_stale_chunks(self, doc_id: str, keep_ids: list) -> None:
+        """
+        Delete every chunk of a document except keep_ids: chunks of removed pages,
+        of pages that now have fewer chunks, and duplicates from earlier versions.
+        """
+        if not keep_ids:
+            self.delete_document(doc_id)
+            return
+        self._delete_points(models.Filter(
+            must=[self._metadata_condition("doc_id", doc_id)],
+            must_not=[models.HasIdCondition(has_id=list(keep_ids))]
+        ))
+
+    def count_chunks(self, doc_id: str) -> int:
+        """Number of chunks stored for a document"""
+        return self.vectorstore.client.count(
+            collection_name=self.collection_name,
+            count_filter=models.Filter(must=[self._metadata_condition("doc_id", doc_id)]),
+            exact=True
+        ).count
 
-    def similarity_search(self, query: str, k: int = 3):
-        """Search for similar documents in the vector store"""
+    def _delete_points(self, points_filter: models.Filter) -> None:
+        self.vectorstore.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=points_filter)
+        )
+
+    def similarity_search(self, query: str, k: int = 3) -> list:
+        """
+        Search for similar documents in the vector store.
+        Returns dicts with 'page_content' and 'metadata' (holding the 'score'), best first.
+        """
         try:
-            # Use QdrantVectorStore's similarity_search
-            results = self.vectorstore.similarity_search(
-                query,
-                k=k,
-                include_metadata=True
-            )
-            return results
+            return [
+                {"page_content": result["content"], "metadata": {**result["metadata"], "score": result["score"]}}
+                for result in self.search(query, limit=k)
+            ]
         except Exception as e:
             print(f"❌ Error during similarity search: {str(e)}")
             return []
 
-    def chunk_text(self, text: str, max_chunk_size: int = 1000) -> list:
-        """Split text into semantically meaningful chunks"""
-        
-        # Split into sections based on headers or semantic markers
-        sections = self._split_into_sections(text)
-        chunks = []
-        
-        for section in sections:
-            # Split section into sentences
-            sentences = section.split('.')
-            current_chunk = []
-            current_size = 0
-            
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if not sentence:
-                    continue
-                    
-                # Add sentence terminator back
-                sentence = sentence + '.'
-                
-                # Start new chunk if:
-                # 1. Current chunk would exceed max size
-                # 2. Current sentence contains a header marker
-                # 3. Natural break point is detected
-                if (current_size + len(sentence) > max_chunk_size or
-                    self._is_header(sentence) or
-                    self._is_natural_break(current_chunk, sentence)):
-                    
-                    if current_chunk:
-                        chunks.append(' '.join(current_chunk))
-                    current_chunk = [sentence]
-                    current_size = len(sentence)
-                else:
-                    current_chunk.append(sentence)
-                    current_size += len(sentence) + 1
-                    
-            if current_chunk:
-                chunks.append(' '.join(current_chunk))
-                
-        return chunks
-
-    def _split_into_sections(self, text: str) -> list:
-        """Split text into logical sections based on markers"""
-        # Common section markers from your documents
-        markers = [
-            '[PPTX Slide',
-            '[PDF Page',
-            '[DOCX',
-            '# ',
-            '## ',
-            '\n\n'
-        ]
-        sections = []
-        current_section = []
-        
-        for line in text.split('\n'):
-            if any(marker in line for marker in markers):
-                if current_section:
-                    sections.append('\n'.join(current_section))
-                    current_section = []
-            current_section.append(line)
-            
-        if current_section:
-            sections.append('\n'.join(current_section))
-        
-        return sections
-
-    def _is_header(self, text: str) -> bool:
-        """Check if text is a header"""
-        header_patterns = [
-            '[PPTX Slide',
-            '[PDF Page',
-            '[DOCX',
-            '# ',
-            '## ',
-            'Chapter',
-            'Section'
-        ]
-        return any(pattern in text for pattern in header_patterns)
-
-    def _is_natural_break(self, current_chunk: list, next_sentence: str) -> bool:
-        """Determine if there should be a natural break between chunks"""
-        if not current_chunk:
-            return False
-            
-        # Break on topic changes or logical transitions
-        transition_words = [
-            'However,',
-            'Moreover,',
-            'Furthermore,',
-            'In conclusion,',
-            'Therefore,',
-            'Finally,'
-        ]
-        
-        return any(word in next_sentence for word in transition_words)
+    def search(self, query: str, limit: int = 5, offset: int = 0, content_types: list = None,
+               doc_ids: list = None, file_types: list = None, date_from: str = None,
+               date_to: str = None, score_threshold: float = None, dense_weight: float = None,
+               sparse_weight: float = None) -> list:
+        """
+        Search chunks similar to query, restricted to the given content types, documents,
+        file types (e.g. '.pdf') and an added_date range (ISO 8601, inclusive).
+        Filters are applied by Qdrant during the search, using the collection's payload
+        indexes, so a narrow scope is searched as fast as it is small.
+
+        The embedding ranking and the BM25 keyword ranking, which finds exact identifiers
+        and error messages, are fused with reciprocal rank fusion weighted by dense_weight
+        and sparse_weight (SEARCH_DENSE_WEIGHT and SEARCH_SPARSE_WEIGHT by default). A zero
+        weight turns a ranking off; without sparse vectors in the collection the search is
+        dense-only. Fused scores are rank-based, and score_threshold only filters the
+        embedding ranking.
+        Results are served from the retrieval cache while the collection is unchanged.
+        Returns dicts with the chunk 'id', 'score', 'content' and 'metadata', best first,
+        skipping the first offset results.
+        """
+        params = {
+            "limit": limit, "offset": offset, "content_types": content_types, "doc_ids": doc_ids,
+            "file_types": file_types, "date_from": date_from, "date_to": date_to,
+            "score_threshold": score_threshold,
+            "dense_weight": SEARCH_DENSE_WEIGHT if dense_weight is None else dense_weight,
+            "sparse_weight": SEARCH_SPARSE_WEIGHT if sparse_weight is None else sparse_weight,
+        }
+        cache = get_retrieval_cache()
+        if cache is None:
+            return self._search(query, **params)
+        return cache.get_or_search(
+            self.collection_name, query, {**params, "embedder": self.embedder},
+            lambda: self._search(query, **params)
+        )
+
+    def _search(self, query: str, limit: int, offset: int, content_types: list, doc_ids: list,
+                file_types: list, date_from: str, date_to: str, score_threshold: float,
+                dense_weight: float, sparse_weight: float) -> list:
+        query_filter = self._search_filter(content_types, doc_ids, file_types, date_from, date_to)
+
+        sparse_query = None
+        if self.sparse_vector_name and sparse_weight > 0:
+            indices, values = self.sparse_encoder.encode_query(query)
+            if indices:
+                sparse_query = models.SparseVector(indices=indices, values=values)
+        if sparse_query is None:
+            # No keyword ranking to fuse with: plain dense search, paged by Qdrant
+            response = self.vectorstore.client.query_points(
+                collection_name=self.collection_name,
+                query=self.encoder.embed_query(query),
+                using=self.vectorstore.vector_name or None,
+                query_filter=query_filter,
+                search_params=self.profile.search_params(),
+                limit=limit,
+                offset=offset,
+                score_threshold=score_threshold,
+                with_payload=True
+            )
+            return [self._search_result(point, point.score) for point in response.points]
+
+        # Both rankings in one round trip, each deep enough to fuse the requested page
+        candidates = (offset + limit) * max(1, HYBRID_PREFETCH_FACTOR)
+        requests, weights = [], []
+        if dense_weight > 0:
+            requests.append(models.QueryRequest(
+                query=self.encoder.embed_query(query),
+                using=self.vectorstore.vector_name or None,
+                filter=query_filter,
+                params=self.profile.search_params(),
+                limit=candidates,
+                score_threshold=score_threshold,
+                with_payload=True
+            ))
+            weights.append(dense_weight)
+        requests.append(models.QueryRequest(
+            query=sparse_query,
+            using=self.sparse_vector_name,
+            filter=query_filter,
+            limit=candidates,
+            with_payload=True
+        ))
+        weights.append(sparse_weight)
+        responses = self.vectorstore.client.query_batch_points(
+            collection_name=self.collection_name, requests=requests
+        )
+        points = {str(point.id): point for response in responses for point in response.points}
+        fused = weighted_rrf(
+            [[str(point.id) for point in response.points] for response in responses], weights, k=RRF_K
+        )
+        return [self._search_result(points[point_id], score) for point_id, score in fused[offset:offset + limit]]
+
+    def _search_result(self, point, score: float) -> dict:
+        return {
+            "id": str(point.id),
+            "score": score,
+            "content": point.payload.get(self.vectorstore.content_payload_key, ""),
+            "metadata": point.payload.get(self.vectorstore.metadata_payload_key) or {},
+        }
+
+    def _search_filter(self, content_types=None, doc_ids=None, file_types=None,
+                       date_from=None, date_to=None):
+        conditions = []
+        for key, values in (("content_type", content_types), ("doc_id", doc_ids), ("file_type", file_types)):
+            if values:
+                conditions.append(models.FieldCondition(
+                    key=f"{self.vectorstore.metadata_payload_key}.{key}",
+                    match=models.MatchAny(any=list(values))
+                ))
+        if date_from or date_to:
+            conditions.append(models.FieldCondition(
+                key=f"{self.vectorstore.metadata_payload_key}.added_date",
+                range=models.DatetimeRange(gte=date_from, lte=date_to)
+            ))
+        return models.Filter(must=conditions) if conditions else None
+
+    def ping(self) -> dict:
+        """Round trip to Qdrant, returning the collection's status and point count"""
+        info = self.vectorstore.client.get_collection(self.collection_name)
+        return {
+            "collection": self.collection_name,
+            "collection_status": info.status.value,
+            "points": info.points_count,
+        }
+
+    def close(self) -> None:
+        """Close the Qdrant connection"""
+        self.vectorstore.client.close()
+
+    def chunk_text(self, text: str, max_tokens: int = None) -> list:
+        """Split text into token-bounded chunks along its sections and sentences"""
+        if max_tokens is None:
+            return self.chunker.split(text)
+        return TextChunker(max_tokens=max_tokens, count_tokens=self.chunker.count_tokens).split(text)
 
     def _split_content(self, content: str) -> list:
-        """Split content into chunks using the existing chunk_text method"""
+        """Split content into chunks using the chunk_text method"""
         return self.chunk_text(content)
 
     def _get_embedding(self, text: str) -> list:
         """Get embedding vector for text using NVIDIA embeddings"""
         embeddings = self.encoder.embed_query(text)
-        return embeddings
\ No newline at end of file
+        return embeddings
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(collection_name: str = VECTOR_COLLECTION) -> VectorStore:
+    """
+    Return the VectorStore shared by the process for a collection, connecting on
+    first use, so requests reuse one embedding client and one Qdrant channel.
+    """
+    with _stores_lock:
+        store = _stores.get(collection_name)
+        if store is None:
+            store = _stores[collection_name] = VectorStore(collection_name)
+        return store
+
+
+def reset_vector_store(collection_name: str = None) -> None:
+    """Close and drop the shared VectorStore of a collection, or all of them (for tests)."""
+    with _stores_lock:
+        names = [collection_name] if collection_name is not None else list(_stores)
+        stores = [_stores.pop(name) for name in names if name in _stores]
+    for store in stores:
+        try:
+            store.close()
+        except Exception as e:
+            print(f"Error closing vector store {store.collection_name}: {e}")
+
+
+def vector_store_health(collection_name: str = VECTOR_COLLECTION) -> dict:
+    """
+    Probe the shared VectorStore's connection without creating it. When the probe
+    fails the instance is dropped, so the next request connects again; requests
+    already using it keep their client.
+    """
+    with _stores_lock:
+        store = _stores.get(collection_name)
+    if store is None:
+        return {"status": "NOT_CONNECTED"}
+    try:
+        return {"status": "UP", **store.ping()}
+    except Exception as e:
+        with _stores_lock:
+            if _stores.get(collection_name) is store:
+                del _stores[collection_name]
+        return {"status": "DOWN", "error": str(e)}
@@ -69,6 +69,9 @@ def start_service():
     # Import and run the Flask app
     try:
         from src.main import app
+        from src.utils.model_registry import warm_up_models
+        from src.services.ingestion_jobs import start_ingestion_workers
+        from src.utils.vector_store import get_vector_store
         
         host = os.getenv('HOST', '0.0.0.0')
         port = int(os.getenv('PORT', 8000))
@@ -79,6 +82,16 @@ def start_service():
         print(f"Service name: {os.getenv('SERVICE_NAME')}")
         print(f"Eureka server: {os.getenv('DISCOVERY_SERVICE_URL')}")
         
+        # In debug mode the reloader re-runs this script in a child process that
+        # serves requests; only that process loads models and starts workers
+        if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            warm_up_models()
+            # Connect to Qdrant and migrate the collection to the configured profile
+            try:
+                get_vector_store()
+            except Exception as e:
+                print(f"Warning: Vector store unavailable at startup, will retry on first use: {e}")
+            start_ingestion_workers()
         app.run(host=host, port=port, debug=debug)
         
     except ImportError as e:
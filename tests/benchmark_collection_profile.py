@@ -0,0 +1,113 @@
+# File: benchmark_collection_profile.py
+# Compares search recall and latency of a collection created with Qdrant's defaults
+# and one created with the configured CollectionProfile, on synthetic clustered
+# embeddings with chunk-like payloads.
+#
+# Usage: python tests/benchmark_collection_profile.py [qdrant_url] [points] [dimensions]
+# The default ":memory:" stand-in searches exhaustively and ignores HNSW and quantization
+# settings, so it only checks the setup; run a local server for meaningful numbers:
+#   docker run -p 6333:6333 qdrant/qdrant && python tests/benchmark_collection_profile.py http://localhost:6333 200000 1024
+import os
+import sys
+import time
+import warnings
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from src.utils.collection_profile import CollectionProfile
+
+CONTENT_TYPES = ["text", "table", "image"]
+QUERIES = 200
+K = 10
+
+def make_data(points, dimensions, seed=0):
+    """Unit vectors scattered around one topic per 500 points, like embeddings of a corpus."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(8, points // 500), dimensions))
+    vectors = centers[rng.integers(len(centers), size=points)] + 0.6 * rng.normal(size=(points, dimensions))
+    queries = centers[rng.integers(len(centers), size=QUERIES)] + 0.6 * rng.normal(size=(QUERIES, dimensions))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+def fill(client, name, profile, vectors, batch_size=1000):
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    profile.create(client, name, vector_size=vectors.shape[1])
+    for start in range(0, len(vectors), batch_size):
+        client.upsert(name, points=[
+            models.PointStruct(id=i, vector={"": vectors[i].tolist()}, payload={"page_content": f"chunk {i}", "metadata": {
+                "doc_id": f"doc-{i // 50}", "content_type": CONTENT_TYPES[i % 3], "page": i % 50, "chunk_index": 0
+            }})
+            for i in range(start, min(start + batch_size, len(vectors)))
+        ], wait=True)
+    # Wait for the index and quantized vectors to be built
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+def run_queries(client, name, profile, queries, query_filter=None):
+    """Return (result ID lists, latencies in ms)."""
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        response = client.query_points(
+            name, query=query.tolist(), limit=K, query_filter=query_filter,
+            search_params=profile.search_params(), with_payload=False
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([point.id for point in response.points])
+    return results, latencies
+
+def exact_top_k(vectors, queries, allowed=None):
+    scores = queries @ vectors.T
+    if allowed is not None:
+        scores[:, ~allowed] = -np.inf
+    return [list(row) for row in np.argsort(-scores, axis=1)[:, :K]]
+
+def recall(results, truth):
+    return np.mean([len(set(found) & set(expected)) / K for found, expected in zip(results, truth)])
+
+def vector_ram_mb(profile, points, dimensions):
+    """Estimated RAM held by vectors: originals unless on disk, plus the quantized copy."""
+    ram = 0 if profile.vectors_on_disk else points * dimensions * 4
+    ram += {"scalar": points * dimensions, "binary": points * dimensions / 8}.get(profile.quantization, 0)
+    return ram / 1e6
+
+def benchmark(url=":memory:", points=20000, dimensions=384):
+    client = QdrantClient(location=url) if url == ":memory:" else QdrantClient(url=url)
+    vectors, queries = make_data(points, dimensions)
+    truth = exact_top_k(vectors, queries)
+    table_filter = models.Filter(must=[models.FieldCondition(key="metadata.content_type", match=models.MatchValue(value="table"))])
+    filtered_truth = exact_top_k(vectors, queries, allowed=np.arange(points) % 3 == 1)
+
+    profiles = {
+        "qdrant defaults": CollectionProfile(hnsw_m=16, hnsw_ef_construct=100, search_hnsw_ef=0, quantization="none",
+                                             vectors_on_disk=False, payload_on_disk=False, payload_indexes={}),
+        "profile": CollectionProfile(),
+    }
+    print(f"{points} points of {dimensions} dimensions, {QUERIES} queries, top {K}, Qdrant at {url}")
+    print(f"{'collection':<16} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8} {'filtered recall':>16} {'filtered p99':>13} {'vector RAM MB':>14}")
+    for name, profile in profiles.items():
+        collection = "benchmark_" + name.replace(" ", "_")
+        with warnings.catch_warnings():
+            # The in-memory stand-in warns that payload indexes and search params have no effect
+            warnings.simplefilter("ignore")
+            fill(client, collection, profile, vectors)
+            # Warm up before timing
+            run_queries(client, collection, profile, queries[:10])
+            results, latencies = run_queries(client, collection, profile, queries)
+            filtered, filtered_latencies = run_queries(client, collection, profile, queries, table_filter)
+        print(f"{name:<16} {recall(results, truth):>7.3f} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 99):>8.2f} {recall(filtered, filtered_truth):>16.3f} "
+              f"{np.percentile(filtered_latencies, 99):>13.2f} {vector_ram_mb(profile, points, dimensions):>14.1f}")
+        client.delete_collection(collection)
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    benchmark(
+        url=args[0] if args else ":memory:",
+        points=int(args[1]) if len(args) > 1 else 20000,
+        dimensions=int(args[2]) if len(args) > 2 else 384,
+    )
@@ -0,0 +1,68 @@
+# File: benchmark_table_prescreen.py
+# Compares PDF table extraction with and without the ruling-line pre-screen
+# on the sample PDFs in data/documents, plus a generated PDF with ruled tables:
+# time spent and tables found.
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber
+from src.utils.table_extractor import pdf_page_tables, pdf_page_may_have_tables
+from tests.test_table_prescreen import make_sample_pdf
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def extract_all_tables(pdf_path, prescreen):
+    """Return (tables, seconds spent on tables, candidate page count) for a PDF."""
+    tables = []
+    seconds = 0.0
+    candidates = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            # Parse the layout up front, as the pipeline does for text, so only table work is timed
+            page.objects
+            start = time.perf_counter()
+            candidates += pdf_page_may_have_tables(page)
+            tables.extend(pdf_page_tables(page, page_num, prescreen=prescreen))
+            seconds += time.perf_counter() - start
+            page.flush_cache()
+    return tables, seconds, candidates
+
+def benchmark(pdf_path, repeats=3):
+    baseline_times, prescreen_times = [], []
+    for _ in range(repeats):
+        baseline_tables, seconds, _ = extract_all_tables(pdf_path, prescreen=False)
+        baseline_times.append(seconds)
+        prescreen_tables, seconds, candidates = extract_all_tables(pdf_path, prescreen=True)
+        prescreen_times.append(seconds)
+
+    with pdfplumber.open(pdf_path) as pdf:
+        page_count = len(pdf.pages)
+    baseline, screened = min(baseline_times), min(prescreen_times)
+    print(f"\n{os.path.basename(pdf_path)}: {page_count} pages, {candidates} table candidates")
+    print(f"  full extraction: {baseline:.3f}s, {len(baseline_tables)} tables")
+    print(f"  pre-screened:    {screened:.3f}s, {len(prescreen_tables)} tables")
+    print(f"  speedup:         {baseline / screened:.1f}x" if screened else "  speedup: n/a")
+
+    missed = [table for table in baseline_tables if table not in prescreen_tables]
+    assert not missed, f"Pre-screen lost {len(missed)} tables: {missed[:3]}"
+    print("  table recall unchanged")
+
+if __name__ == "__main__":
+    documents_dir = os.path.join(project_root, "data", "documents")
+    pdf_paths = sorted(
+        os.path.join(documents_dir, name) for name in os.listdir(documents_dir)
+        if name.lower().endswith(".pdf")
+    )
+    print(f"Found {len(pdf_paths)} PDFs.")
+    for pdf_path in pdf_paths:
+        benchmark(pdf_path)
+
+    # The sample documents may hold no ruled tables, so recall is also checked on one that does
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sample_path = os.path.join(tmp_dir, "ruled_tables_sample.pdf")
+        with open(sample_path, "wb") as f:
+            f.write(make_sample_pdf()[0])
+        benchmark(sample_path)
@@ -0,0 +1,157 @@
+# File: test_chunker.py
+# Property tests for the text chunker, plus micro-benchmarks when run as a script.
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.chunker import TextChunker, estimate_tokens
+
+WORDS = ["model", "vector", "the", "embedding", "of", "a", "pipeline", "data", "index", "query",
+         "retrieval", "3.14", "v2.0", "https://example.com/docs/page.html", "obj.method()",
+         "config.yaml", "e-mail", "internationalization", "x", "table"]
+TRANSITIONS = ["However,", "Moreover,", "Finally,"]
+
+
+def random_sentence(rng, transitions=True):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(3, 30))]
+    if transitions and rng.random() < 0.1:
+        words.insert(0, rng.choice(TRANSITIONS))
+    else:
+        words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", "!", "?"])
+
+
+def random_document(rng, sections=5, transitions=True):
+    parts = []
+    for page in range(1, sections + 1):
+        lines = [f"[PDF Page {page}]"]
+        for _ in range(rng.randint(1, 12)):
+            lines.append(" ".join(random_sentence(rng, transitions) for _ in range(rng.randint(1, 5))))
+        if rng.random() < 0.3:
+            lines.append(f"[PDF Page {page} - Table 1]")
+            lines.extend(" | ".join(rng.choice(WORDS) for _ in range(4)) for _ in range(rng.randint(1, 40)))
+        parts.append("\n".join(lines))
+    return "\n".join(parts)
+
+
+def section_of(chunk):
+    return chunk.split("\n", 1)[0] if chunk.startswith("[") else None
+
+
+def test_chunks_fit_the_token_budget():
+    rng = random.Random(1)
+    for max_tokens in (16, 64, 256):
+        chunker = TextChunker(max_tokens=max_tokens, overlap_tokens=max_tokens // 4, count_tokens=estimate_tokens)
+        for _ in range(20):
+            for chunk in chunker.split(random_document(rng)):
+                assert estimate_tokens(chunk) <= max_tokens, chunk
+
+
+def test_chunks_cover_the_text_in_order():
+    rng = random.Random(2)
+    chunker = TextChunker(max_tokens=64, overlap_tokens=0, count_tokens=estimate_tokens)
+    for _ in range(20):
+        text = " ".join(random_sentence(rng) for _ in range(rng.randint(1, 60)))
+        chunks = chunker.split(text)
+        assert " ".join(chunks).split() == text.split()
+
+
+def test_overlap_repeats_the_end_of_the_previous_chunk():
+    rng = random.Random(3)
+    chunker = TextChunker(max_tokens=96, overlap_tokens=24, count_tokens=estimate_tokens)
+    for _ in range(20):
+        # Number the sentences so repeated ones can be told apart
+        sentences = [f"S{i} " + random_sentence(rng, transitions=False) for i in range(40)]
+        chunks = chunker.split(" ".join(sentences))
+        for previous, chunk in zip(chunks, chunks[1:]):
+            previous_ids = [word for word in previous.split() if word[0] == "S" and word[1:].isdigit()]
+            chunk_ids = [word for word in chunk.split() if word[0] == "S" and word[1:].isdigit()]
+            repeated = [sentence_id for sentence_id in chunk_ids if sentence_id in previous_ids]
+            # The repeated sentences are the whole sentences ending the previous chunk
+            assert repeated == chunk_ids[:len(repeated)]
+            assert repeated == previous_ids[len(previous_ids) - len(repeated):]
+            repeated_text = " ".join(sentences[int(sentence_id[1:])] for sentence_id in repeated)
+            assert estimate_tokens(repeated_text) <= 24
+            # Every chunk brings new content (chunks without an ID continue an oversized sentence)
+            assert not chunk_ids or len(repeated) < len(chunk_ids)
+
+
+def test_chunks_never_cross_section_markers():
+    rng = random.Random(4)
+    chunker = TextChunker(max_tokens=48, overlap_tokens=12, count_tokens=estimate_tokens)
+    for _ in range(20):
+        for chunk in chunker.split(random_document(rng)):
+            marker = section_of(chunk)
+            assert marker is not None, chunk
+            # Every chunk starts with its own marker and holds no other
+            assert "[PDF Page" not in chunk[len(marker):], chunk
+
+
+def test_packing_is_tight():
+    rng = random.Random(5)
+    max_tokens = 128
+    chunker = TextChunker(max_tokens=max_tokens, overlap_tokens=0, count_tokens=estimate_tokens)
+    for _ in range(20):
+        text = " ".join(random_sentence(rng, transitions=False) for _ in range(50))
+        chunks = chunker.split(text)
+        for chunk, following in zip(chunks, chunks[1:]):
+            first_sentence = next(chunker._units(following, max_tokens))
+            first_tokens = estimate_tokens(following[first_sentence[0]:first_sentence[1]])
+            # The next chunk's first sentence did not fit in this one
+            assert estimate_tokens(chunk) + first_tokens > max_tokens
+
+
+def test_decimals_urls_and_code_stay_whole():
+    chunker = TextChunker(max_tokens=16, overlap_tokens=0, count_tokens=estimate_tokens)
+    text = ("Pi is 3.14 today. Read https://example.com/a.b now. "
+            "Call obj.method() twice. Open config.yaml first.")
+    chunks = chunker.split(text)
+    for token in ("3.14", "https://example.com/a.b", "obj.method()", "config.yaml"):
+        assert any(token in chunk for chunk in chunks), (token, chunks)
+    assert len(chunks) == 4
+
+
+def test_table_rows_keep_their_line_breaks():
+    chunker = TextChunker(max_tokens=32, overlap_tokens=0, count_tokens=estimate_tokens)
+    rows = [f"row{i} | a | b" for i in range(30)]
+    chunks = chunker.split("[PDF Page 1 - Table 1]\n" + "\n".join(rows))
+    for chunk in chunks:
+        for line in chunk.split("\n")[1:]:
+            assert line in rows, line
+
+
+def test_oversized_words_are_split():
+    chunker = TextChunker(max_tokens=10, overlap_tokens=0, count_tokens=estimate_tokens)
+    blob = "A" * 400
+    chunks = chunker.split(f"Encoded {blob} end.")
+    assert "".join(chunks).replace("Encoded", "").replace("end.", "").replace(" ", "") == blob
+    assert all(estimate_tokens(chunk) <= 10 for chunk in chunks)
+
+
+def test_empty_text_has_no_chunks():
+    chunker = TextChunker(max_tokens=32, count_tokens=estimate_tokens)
+    assert chunker.split("") == []
+    assert chunker.split("  \n\n ") == []
+
+
+def benchmark(sizes=(25, 100, 400, 1600), repeats=3):
+    """Print chunking throughput and chunk statistics for growing documents."""
+    rng = random.Random(0)
+    chunker = TextChunker(max_tokens=256, overlap_tokens=32, count_tokens=estimate_tokens)
+    print(f"{'sections':>9} {'chars':>10} {'chunks':>7} {'avg tokens':>11} {'ms':>9} {'MB/s':>7}")
+    for sections in sizes:
+        text = random_document(rng, sections=sections)
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            chunks = chunker.split(text)
+            best = min(best, time.perf_counter() - start)
+        average = sum(estimate_tokens(chunk) for chunk in chunks) / len(chunks)
+        print(f"{sections:>9} {len(text):>10} {len(chunks):>7} {average:>11.1f} "
+              f"{best * 1000:>9.1f} {len(text) / best / 1e6:>7.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
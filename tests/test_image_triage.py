@@ -0,0 +1,53 @@
+# File: test_image_triage.py
+# Checks that image triage drops decorative images but keeps sparse text screenshots.
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw
+from src.utils.image_triage import ImageTriage
+
+CODE_LINE = "def reverse_string(s: str) -> str: return s[::-1]"
+
+
+def text_screenshot(lines=1, size=(1200, 800)):
+    """A white screenshot with a few lines of black code text."""
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for i in range(lines):
+        draw.text((40, 40 + 30 * i), CODE_LINE, fill="black")
+    return image
+
+
+def test_text_screenshots_are_kept():
+    triage = ImageTriage(enabled=True)
+    for lines in (1, 3):
+        assert triage.skip_reason(text_screenshot(lines)) is None, lines
+
+
+def test_solid_and_noisy_fills_are_dropped():
+    triage = ImageTriage(enabled=True)
+    assert triage.skip_reason(Image.new("RGB", (400, 300), (240, 240, 240))) == "low_entropy"
+    rng = np.random.default_rng(0)
+    noise = np.full((300, 400, 3), 200.0) + rng.normal(0, 1.5, (300, 400, 3))
+    assert triage.skip_reason(Image.fromarray(noise.clip(0, 255).astype("uint8"))) in ("low_entropy", "low_variance")
+
+
+def test_small_images_are_dropped():
+    triage = ImageTriage(enabled=True)
+    assert triage.skip_reason(text_screenshot(size=(40, 40))) == "too_small"
+
+
+def test_different_screenshots_are_not_near_duplicates():
+    triage = ImageTriage(enabled=True)
+    kept = triage.filter([{"image": text_screenshot(1)}, {"image": text_screenshot(3)}])
+    assert len(kept) == 2
+
+
+def test_rescaled_copies_are_near_duplicates():
+    triage = ImageTriage(enabled=True)
+    image = text_screenshot(3)
+    kept = triage.filter([{"image": image}, {"image": image.resize((900, 600))}])
+    assert len(kept) == 1
+    assert triage.report()["skipped_by_reason"]["near_duplicate"] == 1
@@ -0,0 +1,103 @@
+# File: test_table_prescreen.py
+# Checks the ruling-line table pre-screen against pdfplumber's table finder on a
+# generated PDF with ruled tables, a framed box, underlines and plain text.
+import io
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz
+import pdfplumber
+from src.utils.table_extractor import pdf_page_may_have_tables, pdf_page_tables
+
+TABLE_ROWS = [["Week", "Topic", "Lab"], ["1", "Loops", "Lab 1"], ["2", "Recursion", "Lab 2"]]
+
+
+def draw_grid(page, rows, x=72, y=100, cell_width=120, cell_height=24):
+    """Draw a fully ruled table and fill in its cells."""
+    width, height = cell_width * len(rows[0]), cell_height * len(rows)
+    for i in range(len(rows) + 1):
+        page.draw_line((x, y + i * cell_height), (x + width, y + i * cell_height))
+    for j in range(len(rows[0]) + 1):
+        page.draw_line((x + j * cell_width, y), (x + j * cell_width, y + height))
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            page.insert_text((x + j * cell_width + 6, y + (i + 1) * cell_height - 8), cell, fontsize=10)
+
+
+def make_sample_pdf():
+    """Return the bytes of a PDF with one layout per page, and which pages hold tables."""
+    doc = fitz.open()
+
+    # A 3x3 ruled table
+    draw_grid(doc.new_page(), TABLE_ROWS)
+
+    # The smallest ruled table: two cells side by side
+    draw_grid(doc.new_page(), [["Name", "Score"]])
+
+    # Plain text
+    page = doc.new_page()
+    page.insert_text((72, 100), "This page only has prose about sorting algorithms.", fontsize=11)
+    page.insert_text((72, 120), "Week 1 | Loops | Lab 1 is written inline, not as a table.", fontsize=11)
+
+    # A framed note: a single cell, drawn as four lines (fitz's draw_rect adds a
+    # zero-length closing segment, which the pre-screen counts as an edge)
+    page = doc.new_page()
+    for start, end in [((72, 90), (400, 90)), ((400, 90), (400, 140)),
+                       ((400, 140), (72, 140)), ((72, 140), (72, 90))]:
+        page.draw_line(start, end)
+    page.insert_text((80, 115), "Note: submissions close on Friday.", fontsize=11)
+
+    # Underlined headings
+    page = doc.new_page()
+    for y in (100, 160):
+        page.insert_text((72, y), "Section heading", fontsize=14)
+        page.draw_line((72, y + 4), (300, y + 4))
+
+    data = doc.tobytes()
+    doc.close()
+    return data, {1: True, 2: True, 3: False, 4: False, 5: False}
+
+
+def open_sample():
+    data, expected = make_sample_pdf()
+    return pdfplumber.open(io.BytesIO(data)), expected
+
+
+def test_prescreen_accepts_ruled_tables_and_rejects_other_pages():
+    pdf, expected = open_sample()
+    with pdf:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            assert pdf_page_may_have_tables(page) == expected[page_num], page_num
+
+
+def test_prescreen_never_loses_a_table():
+    pdf, _ = open_sample()
+    with pdf:
+        for page_num, page in enumerate(pdf.pages, start=1):
+            full = pdf_page_tables(page, page_num, prescreen=False)
+            assert pdf_page_tables(page, page_num, prescreen=True) == full, page_num
+            if full:
+                assert pdf_page_may_have_tables(page), page_num
+
+
+def test_ruled_table_is_extracted():
+    pdf, _ = open_sample()
+    with pdf:
+        tables = pdf_page_tables(pdf.pages[0], 1, prescreen=True)
+    assert len(tables) == 1
+    rows = tables[0].split("\n")[1:]
+    assert rows == [" | ".join(row) for row in TABLE_ROWS]
+
+
+class FakePage:
+    def __init__(self, horizontal, vertical):
+        self.edges = [{"orientation": "h"}] * horizontal + [{"orientation": "v"}] * vertical
+
+
+def test_prescreen_edge_counts():
+    assert pdf_page_may_have_tables(FakePage(3, 2))
+    assert pdf_page_may_have_tables(FakePage(2, 3))
+    assert not pdf_page_may_have_tables(FakePage(2, 2))
+    assert not pdf_page_may_have_tables(FakePage(10, 1))
+    assert not pdf_page_may_have_tables(FakePage(0, 0))